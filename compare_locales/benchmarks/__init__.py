@@ -0,0 +1,21 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'''Benchmarks of parsing, checking, merging, and comparing.
+
+Run `python -m compare_locales.benchmarks --help` for the options.
+'''
+
+from __future__ import absolute_import
+
+from .corpus import FORMATS, generate
+from .runner import (
+    BENCHMARKS, run_benchmarks, report, compare_reports,
+)
+
+
+__all__ = [
+    'FORMATS', 'generate',
+    'BENCHMARKS', 'run_benchmarks', 'report', 'compare_reports',
+]
@@ -0,0 +1,127 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+
+from compare_locales.benchmarks import corpus
+from compare_locales.benchmarks import runner
+
+
+epilog = '''\
+The results are written as JSON to the --output file. Pass a previous
+output file as --baseline to compare the timings with it.
+'''
+
+
+def _list(value):
+    return [item for item in value.split(',') if item]
+
+
+def main(args=None):
+    p = argparse.ArgumentParser(
+        prog='python -m compare_locales.benchmarks',
+        description='Time parsing, checking, merging, and comparing '
+        'of synthetic files',
+        epilog=epilog,
+    )
+    p.add_argument(
+        '--formats', type=_list, default=list(corpus.FORMATS),
+        help='comma-separated formats, out of {}'.format(
+            ', '.join(corpus.FORMATS)
+        )
+    )
+    p.add_argument(
+        '--benchmarks', type=_list, default=list(runner.BENCHMARKS),
+        help='comma-separated benchmarks, out of {}'.format(
+            ', '.join(runner.BENCHMARKS)
+        )
+    )
+    p.add_argument(
+        '--sizes', type=lambda v: [int(size) for size in _list(v)],
+        default=[100, 1000, 10000],
+        help='comma-separated numbers of strings per file'
+    )
+    p.add_argument(
+        '--locales', type=int, default=4,
+        help='number of locales in the compare benchmark, up to {}'.format(
+            len(runner.LOCALES)
+        )
+    )
+    p.add_argument(
+        '--repeat', type=int, default=3,
+        help='run each benchmark this often, and report the best time'
+    )
+    p.add_argument('--label', help='label for the results, like a commit')
+    p.add_argument(
+        '-o', '--output', metavar='FILE',
+        help='write the results as JSON, pass "-" for stdout'
+    )
+    p.add_argument(
+        '--baseline', metavar='FILE',
+        help='compare the results with this output of a previous run'
+    )
+    args = p.parse_args(args)
+    for format in args.formats:
+        if format not in corpus.FORMATS:
+            p.error('unknown format {}'.format(format))
+    for benchmark in args.benchmarks:
+        if benchmark not in runner.BENCHMARKS:
+            p.error('unknown benchmark {}'.format(benchmark))
+    if not 0 < args.locales <= len(runner.LOCALES):
+        p.error('pass between 1 and {} locales'.format(len(runner.LOCALES)))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    # keep stdout for the JSON output
+    log_file = sys.stderr if args.output == '-' else sys.stdout
+
+    def log(result):
+        print(
+            '{benchmark:10} {format:11} {size:>7} {seconds:10.4f}s'.format(
+                **result
+            ),
+            file=log_file
+        )
+        log_file.flush()
+
+    results = runner.run_benchmarks(
+        formats=args.formats,
+        sizes=args.sizes,
+        benchmarks=args.benchmarks,
+        locales=args.locales,
+        repeat=args.repeat,
+        log=log,
+    )
+    if baseline is not None:
+        print('\nCompared to {}:'.format(
+            baseline.get('label') or args.baseline
+        ), file=log_file)
+        for result, previous, ratio in runner.compare_reports(
+            baseline, results
+        ):
+            print(
+                '{benchmark:10} {format:11} {size:>7} '
+                '{seconds:10.4f}s {previous:10.4f}s {ratio:6.2f}x'.format(
+                    previous=previous, ratio=ratio, **result
+                ),
+                file=log_file
+            )
+    if args.output:
+        data = runner.report(results, label=args.label)
+        if args.output == '-':
+            json.dump(data, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.output, 'w') as f:
+                json.dump(data, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'''Synthetic reference and localized files.
+
+The files are generated deterministically, so that timings can be
+compared across commits.
+Localized files miss every tenth string of the reference, have obsolete
+strings, and some errors for the checks to find.
+'''
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from collections import OrderedDict
+import random
+
+
+WORDS = (
+    'the of and to in is you that it he was for on are as with his they '
+    'at be this have from or one had by word but not what all were we '
+    'when your can said there use an each which she do how their if will '
+    'up other about out many then them these so some her would make like '
+    'him into time has look two more write go see number no way could '
+    'people my than first water been call who oil its now find long down '
+    'day did get come made may part bookmark window download tab private '
+    'browsing history password update security certificate extension'
+).split()
+
+
+class Entry(object):
+    '''A string in the synthetic files.
+
+    `index` is the position in the reference. Every third entry has a
+    placeable, which is rendered in the syntax of the format.
+    '''
+    def __init__(self, key, index, words, placeable=False):
+        self.key = key
+        self.index = index
+        self.words = words
+        self.placeable = placeable
+
+    def text(self, placeable):
+        words = list(self.words)
+        if self.placeable:
+            words.insert(len(words) // 2, placeable)
+        return ' '.join(words)
+
+
+def entries(size, locale=None):
+    '''The entries of a file with `size` strings in the reference.
+
+    For a locale, some strings are missing, some are obsolete,
+    and some lost their placeable.
+    '''
+    rng = random.Random(size)
+    offset = sum(ord(c) for c in locale) if locale else 0
+    for i in range(size):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(1, 12))]
+        entry = Entry('entry{}'.format(i), i, words, placeable=i % 3 == 1)
+        if locale is not None:
+            if (i + offset) % 10 == 9:
+                continue
+            # reverse the words, so they're not a copy of the reference
+            entry.words = [word[::-1] for word in words]
+            if (i + offset) % 50 == 25:
+                entry.placeable = not entry.placeable
+        yield entry
+    if locale is not None:
+        for i in range(0, size, 20):
+            yield Entry('obsolete{}'.format(i), i, ['obsolete'])
+
+
+def dtd(entries):
+    lines = []
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append(
+                '<!-- LOCALIZATION NOTE ({}): {} -->'.format(
+                    entry.key, ' '.join(entry.words[:4])
+                )
+            )
+        lines.append('<!ENTITY {} "{}">'.format(
+            entry.key, entry.text('&entry0;')
+        ))
+    return '\n'.join(lines) + '\n'
+
+
+def properties(entries):
+    lines = []
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append('# LOCALIZATION NOTE ({}): {}'.format(
+                entry.key, ' '.join(entry.words[:4])
+            ))
+        lines.append('{} = {}'.format(entry.key, entry.text('%S')))
+    return '\n'.join(lines) + '\n'
+
+
+def ftl(entries):
+    lines = []
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append('# ' + ' '.join(entry.words[:4]))
+        if entry.index % 7 == 3:
+            lines.extend((
+                '{} ='.format(entry.key),
+                '    { $count ->',
+                '        [one] {}'.format(entry.text('{ $count }')),
+                '       *[other] {}'.format(entry.text('{ $count }')),
+                '    }',
+            ))
+        else:
+            lines.append('{} = {}'.format(
+                entry.key, entry.text('{ $count }')
+            ))
+        if entry.index % 4 == 0:
+            lines.append('    .title = ' + ' '.join(entry.words))
+    return '\n'.join(lines) + '\n'
+
+
+def android(entries):
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<resources>',
+    ]
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append('  <!-- {} -->'.format(' '.join(entry.words[:4])))
+        lines.append('  <string name="{}">{}</string>'.format(
+            entry.key, entry.text('%1$s')
+        ))
+    lines.append('</resources>')
+    return '\n'.join(lines) + '\n'
+
+
+def po(entries):
+    lines = []
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append('#. ' + ' '.join(entry.words[:4]))
+        lines.extend((
+            'msgctxt "{}"'.format(entry.key),
+            'msgid "{}"'.format(entry.key.replace('entry', 'string ')),
+            'msgstr "{}"'.format(entry.text('%s')),
+            '',
+        ))
+    return '\n'.join(lines)
+
+
+def defines(entries):
+    lines = ['#filter emptyLines', '']
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append('# ' + ' '.join(entry.words[:4]))
+        lines.append('#define {} {}'.format(entry.key, entry.text('%S')))
+    lines.extend(('', '#unfilter emptyLines'))
+    return '\n'.join(lines) + '\n'
+
+
+def ini(entries):
+    lines = ['[Strings]']
+    for entry in entries:
+        if entry.index % 5 == 0:
+            lines.append('; ' + ' '.join(entry.words[:4]))
+        lines.append('{}={}'.format(entry.key, entry.text('%S')))
+    return '\n'.join(lines) + '\n'
+
+
+# The supported formats, with the file name to use, and the generator
+FORMATS = OrderedDict((
+    ('dtd', ('strings.dtd', dtd)),
+    ('properties', ('strings.properties', properties)),
+    ('ftl', ('strings.ftl', ftl)),
+    ('android', ('strings.xml', android)),
+    ('po', ('strings.po', po)),
+    ('inc', ('defines.inc', defines)),
+    ('ini', ('strings.ini', ini)),
+))
+
+
+def filename(format):
+    return FORMATS[format][0]
+
+
+def generate(format, size, locale=None):
+    '''Generate the contents of a file as utf-8 encoded bytes.
+
+    Without a locale, this is the reference file with `size` strings.
+    '''
+    _, generator = FORMATS[format]
+    return generator(entries(size, locale)).encode('utf-8')
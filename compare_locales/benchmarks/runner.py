@@ -0,0 +1,246 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'''Timing of the stages of a comparison.
+
+Each benchmark creates a function to time from the reference and
+localized contents of a file. The function is run `repeat` times,
+and the best time is reported.
+'''
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from collections import OrderedDict
+import os
+import platform
+import shutil
+import tempfile
+import timeit
+
+from compare_locales import checks
+from compare_locales import mozpath
+from compare_locales import parser
+from compare_locales import paths
+from compare_locales import version
+from compare_locales.compare import compareProjects
+from compare_locales.merge import merge_channels, MergeNotSupportedError
+from compare_locales.serializer import (
+    serialize,
+    SerializationNotSupportedError,
+)
+from . import corpus
+
+
+LOCALES = ('de', 'fr', 'it', 'ja', 'pl', 'pt-BR', 'ru', 'zh-TW')
+# compareProjects only supports string keys, which PO files don't have
+COMPARE_EXCLUDES = ('po',)
+
+
+def parse(name, reference, localization):
+    p = parser.createParser(name)
+
+    def run():
+        p.readContents(localization)
+        p.parse()
+    return run
+
+
+def walk(name, reference, localization):
+    p = parser.createParser(name)
+
+    def run():
+        p.readContents(localization)
+        for _ in p.walk():
+            pass
+    return run
+
+
+def check(name, reference, localization):
+    p = parser.createParser(name)
+    p.readContents(reference)
+    ref_entities = p.parse()
+    p.readContents(localization)
+    l10n_entities = p.parse()
+    pairs = [
+        (ref_entities[l10n.key], l10n)
+        for l10n in l10n_entities
+        if not isinstance(l10n, parser.Junk) and l10n.key in ref_entities
+    ]
+    l10n_file = paths.File(name, name, locale='de')
+
+    def run():
+        checker = checks.getChecker(l10n_file)
+        if checker.needs_reference:
+            checker.set_reference(ref_entities)
+        for ref, l10n in pairs:
+            for _ in checker.check(ref, l10n):
+                pass
+    return run
+
+
+def merge(name, reference, localization):
+    # merge_channels takes the files of different channels of the same
+    # locale, use the reference and the localization as stand-ins
+    def run():
+        merge_channels(name, [localization, reference])
+    return run
+
+
+def serialize_(name, reference, localization):
+    p = parser.createParser(name)
+    p.readContents(reference)
+    ref_entries = list(p.walk())
+    p.readContents(localization)
+    l10n_entries = list(p.walk())
+    # update every other string
+    new_data = OrderedDict(
+        (entity.key, entity.raw_val)
+        for i, entity in enumerate(p.parse())
+        if i % 2 == 0
+    )
+
+    def run():
+        serialize(name, ref_entries, l10n_entries, new_data)
+    return run
+
+
+# The benchmarks on single files, by name
+FILE_BENCHMARKS = OrderedDict((
+    ('parse', parse),
+    ('walk', walk),
+    ('check', check),
+    ('merge', merge),
+    ('serialize', serialize_),
+))
+BENCHMARKS = tuple(FILE_BENCHMARKS) + ('compare',)
+
+
+def best_time(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def run_benchmarks(
+            formats=None,
+            sizes=(100, 1000),
+            benchmarks=BENCHMARKS,
+            locales=4,
+            repeat=3,
+            log=None,
+        ):
+    '''Run the given benchmarks, and return a list of results.
+
+    The results are dictionaries with the benchmark, format, size,
+    and the best time in seconds. The `compare` benchmark runs
+    compareProjects over the formats and `locales` locales, and reports
+    `all` as format if that's all formats.
+    If given, `log` is called with each result.
+    '''
+    if formats is None:
+        formats = list(corpus.FORMATS)
+    results = []
+
+    def add(benchmark, format, size, seconds):
+        result = OrderedDict((
+            ('benchmark', benchmark),
+            ('format', format),
+            ('size', size),
+            ('seconds', seconds),
+        ))
+        results.append(result)
+        if log is not None:
+            log(result)
+
+    for size in sizes:
+        for format in formats:
+            name = corpus.filename(format)
+            reference = corpus.generate(format, size)
+            localization = corpus.generate(format, size, 'de')
+            for benchmark in benchmarks:
+                if benchmark not in FILE_BENCHMARKS:
+                    continue
+                func = FILE_BENCHMARKS[benchmark](
+                    name, reference, localization
+                )
+                try:
+                    seconds = best_time(func, repeat)
+                except (MergeNotSupportedError,
+                        SerializationNotSupportedError):
+                    continue
+                add(benchmark, format, size, seconds)
+        if 'compare' in benchmarks:
+            seconds = time_compare(formats, size, LOCALES[:locales], repeat)
+            if formats == list(corpus.FORMATS):
+                add('compare', 'all', size, seconds)
+            else:
+                add('compare', ','.join(formats), size, seconds)
+    return results
+
+
+def time_compare(formats, size, locales, repeat):
+    '''Time compareProjects on a project with one file per format.'''
+    formats = [
+        format for format in formats if format not in COMPARE_EXCLUDES
+    ]
+    tmp = tempfile.mkdtemp()
+    try:
+        for locale in (None,) + tuple(locales):
+            for format in formats:
+                path = mozpath.join(
+                    tmp, locale or 'en-US', corpus.filename(format)
+                )
+                _write(path, corpus.generate(format, size, locale))
+        config = paths.ProjectConfig(None)
+        config.set_locales(list(locales))
+        config.add_paths({
+            'reference': mozpath.join(tmp, 'en-US', '**'),
+            'l10n': mozpath.join(tmp, '{locale}', '**'),
+        })
+
+        def run():
+            compareProjects([config], list(locales), tmp, quiet=4)
+        return best_time(run, repeat)
+    finally:
+        shutil.rmtree(tmp)
+
+
+def _write(path, contents):
+    dirname = mozpath.dirname(path)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(path, 'wb') as f:
+        f.write(contents)
+
+
+def report(results, label=None):
+    '''The machine-readable report of the results.
+
+    Pass a `label` like a commit hash to tell reports apart.
+    '''
+    return OrderedDict((
+        ('label', label),
+        ('version', version),
+        ('python', platform.python_version()),
+        ('results', results),
+    ))
+
+
+def compare_reports(baseline, results):
+    '''Compare results with those of a previous report.
+
+    Returns a list of tuples of the result, the baseline seconds, and
+    the ratio of the new time to the baseline.
+    '''
+    previous = dict(
+        ((r['benchmark'], r['format'], r['size']), r['seconds'])
+        for r in baseline['results']
+    )
+    comparison = []
+    for result in results:
+        key = (result['benchmark'], result['format'], result['size'])
+        if not previous.get(key):
+            continue
+        comparison.append(
+            (result, previous[key], result['seconds'] / previous[key])
+        )
+    return comparison
@@ -6,15 +6,19 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import re
-from xml.dom import minidom
+from xml.dom import Node
 
 from .base import Checker
-from ..parser.android import textContent
+from ..parser.android import textContent, XMLNode
 
 
 class AndroidChecker(Checker):
     pattern = re.compile('(.*)?strings.*\\.xml$')
 
+    def locale_key(self):
+        # nothing depends on the locale
+        return None
+
     def check(self, refEnt, l10nEnt):
         '''Given the reference and localized Entities, performs checks.
 
@@ -119,21 +123,21 @@ class AndroidChecker(Checker):
         cdata = [
             child
             for child in node.childNodes
-            if child.nodeType == minidom.Node.CDATA_SECTION_NODE
+            if child.nodeType == Node.CDATA_SECTION_NODE
         ]
         if len(cdata) == 0:
-            if node.childNodes.length == 0:
+            if len(node.childNodes) == 0:
                 # empty translation is OK
                 return False
-            if node.childNodes.length != 1:
+            if len(node.childNodes) != 1:
                 return True
-            return node.childNodes[0].nodeType != minidom.Node.TEXT_NODE
+            return node.childNodes[0].nodeType != Node.TEXT_NODE
         if len(cdata) > 1:
             return True
         for child in node.childNodes:
             if child == cdata[0]:
                 continue
-            if child.nodeType != minidom.Node.TEXT_NODE:
+            if child.nodeType != Node.TEXT_NODE:
                 return True
             if child.data.strip() != "":
                 return True
@@ -189,7 +193,7 @@ def get_params(refs):
     errors = []
     next_implicit = 1
     for ref in refs:
-        if isinstance(ref, minidom.Node):
+        if isinstance(ref, XMLNode):
             ref = textContent(ref)
         for m in re.finditer(r'%(?P<order>[1-9]\$)?(?P<format>[sSd])', ref):
             order = m.group('order')
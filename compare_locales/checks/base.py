@@ -31,6 +31,7 @@ class Checker(object):
         self.extra_tests = extra_tests
         self.locale = locale
         self.reference = None
+        self.reference_state = {}
 
     def check(self, refEnt, l10nEnt):
         '''Given the reference and localized Entities, performs checks.
@@ -50,11 +51,24 @@ class Checker(object):
                 "encodings"
             )
 
-    def set_reference(self, reference):
+    def set_reference(self, reference, state=None):
         '''Set the reference entities.
         Only do this if self.needs_reference is True.
+
+        `state` is an optional dictionary to store data computed from
+        the reference in. It's shared between Checkers for the same
+        reference.
         '''
         self.reference = reference
+        self.reference_state = state if state is not None else {}
+
+    def locale_key(self):
+        '''Key for the locale dependent parts of the checks.
+
+        The checks give the same results for the same entities if
+        the locales have the same key. By default, that's the locale.
+        '''
+        return self.locale
 
 
 class CSSCheckMixin(object):
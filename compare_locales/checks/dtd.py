@@ -38,16 +38,55 @@ class DTDChecker(Checker, CSSCheckMixin):
         if self.extra_tests is not None and 'android-dtd' in self.extra_tests:
             self.processContent = True
         self.__known_entities = None
+        self.__parser = None
+
+    def locale_key(self):
+        # nothing depends on the locale
+        return None
 
     def known_entities(self, refValue):
         if self.__known_entities is None and self.reference is not None:
-            self.__known_entities = set()
-            for ent in self.reference.values():
-                self.__known_entities.update(
-                    self.entities_for_value(ent.raw_val))
+            known_entities = self.reference_state.get('known_entities')
+            if known_entities is None:
+                known_entities = set()
+                for ent in self.reference.values():
+                    known_entities.update(
+                        self.entities_for_value(ent.raw_val))
+                self.reference_state['known_entities'] = known_entities
+            self.__known_entities = known_entities
         return self.__known_entities if self.__known_entities is not None \
             else self.entities_for_value(refValue)
 
+    def known_declarations(self, refValue):
+        '''Encoded entity declarations for the known entities.
+
+        If we have a reference, that's the same for each entity. Create
+        it only once per reference then.
+        '''
+        if self.reference is None:
+            return self.declarations(self.known_entities(refValue))
+        declarations = self.reference_state.get('known_declarations')
+        if declarations is None:
+            declarations = self.declarations(self.known_entities(refValue))
+            self.reference_state['known_declarations'] = declarations
+        return declarations
+
+    def declarations(self, entities):
+        return ''.join(
+            '<!ENTITY %s "">' % s for s in sorted(entities)
+        ).encode('utf-8')
+
+    @property
+    def xml_parser(self):
+        '''XML parser to use for all checks.
+
+        The parser is reset for each document, so we only create one.
+        '''
+        if self.__parser is None:
+            self.__parser = sax.make_parser()
+            self.__parser.setFeature(sax.handler.feature_external_ges, False)
+        return self.__parser
+
     def entities_for_value(self, value):
         reflist = set(m.group(1)
                       for m in self.eref.finditer(value))
@@ -84,20 +123,19 @@ class DTDChecker(Checker, CSSCheckMixin):
         # reusing markup from DTDParser.
         reflist = self.known_entities(refValue)
         inContext = self.entities_for_value(refValue)
-        entities = ''.join('<!ENTITY %s "">' % s for s in sorted(reflist))
-        parser = sax.make_parser()
-        parser.setFeature(sax.handler.feature_external_ges, False)
+        entities = self.known_declarations(refValue)
+        parser = self.xml_parser
 
         parser.setContentHandler(self.defaulthandler)
         try:
             parser.parse(
                 six.BytesIO(self.tmpl %
-                            (entities.encode('utf-8'),
+                            (entities,
                              refValue.encode('utf-8'))))
             # also catch stray %
             parser.parse(
                 six.BytesIO(self.tmpl %
-                            ((refEnt.all + entities).encode('utf-8'),
+                            (refEnt.all.encode('utf-8') + entities,
                              b'&%s;' % refEnt.key.encode('utf-8'))))
         except sax.SAXParseException as e:
             e  # noqa
@@ -109,19 +147,19 @@ class DTDChecker(Checker, CSSCheckMixin):
         # reusing markup from DTDParser.
         l10nlist = self.entities_for_value(l10nValue)
         missing = sorted(l10nlist - reflist)
-        _entities = entities + ''.join('<!ENTITY %s "">' % s for s in missing)
+        _entities = entities + self.declarations(missing)
         if self.processContent:
             self.texthandler.textcontent = ''
             parser.setContentHandler(self.texthandler)
         try:
-            parser.parse(six.BytesIO(self.tmpl % (_entities.encode('utf-8'),
+            parser.parse(six.BytesIO(self.tmpl % (_entities,
                          l10nValue.encode('utf-8'))))
             # also catch stray %
             # if this fails, we need to substract the entity definition
             parser.setContentHandler(self.defaulthandler)
             parser.parse(
                 six.BytesIO(self.tmpl %
-                            ((l10nEnt.all + _entities).encode('utf-8'),
+                            (l10nEnt.all.encode('utf-8') + _entities,
                              b'&%s;' % l10nEnt.key.encode('utf-8'))))
         except sax.SAXParseException as e:
             # xml parse error, yield error
@@ -239,7 +239,8 @@ class L10nMessageVisitor(GenericL10nChecks, ReferenceMessageVisitor):
 
     def visit_Attribute(self, node):
         old_reference_refs = self.reference_refs
-        self.reference_refs = self.reference.entry_refs[node.id.name]
+        # don't use defaultdict lookups on the reference, it may be shared
+        self.reference_refs = self.reference.entry_refs.get(node.id.name, {})
         super(L10nMessageVisitor, self).visit_Attribute(node)
         self.reference_refs = old_reference_refs
         if node.id.name != 'style' or self.css_styles == 'skip':
@@ -249,6 +250,9 @@ class L10nMessageVisitor(GenericL10nChecks, ReferenceMessageVisitor):
             # Reference is complex, l10n isn't.
             # Let's still validate the css spec.
             ref_styles = {}
+        else:
+            # check_style consumes the reference styles, copy them
+            ref_styles = dict(ref_styles)
         for cat, msg, pos, _ in self.check_style(
             ref_styles,
             self.css_styles,
@@ -314,11 +318,30 @@ class FluentChecker(Checker):
     '''Tests to run on Fluent (FTL) files.
     '''
     pattern = re.compile(r'.*\.ftl')
+    # to share the reference visitors between locales
+    needs_reference = True
+
+    def reference_visitor(self, ref_entry):
+        '''Get the ReferenceMessageVisitor for a reference message.
+
+        The visitors only depend on the reference, so they're stored in
+        the reference state, keyed by the reference message.
+        '''
+        visitors = self.reference_state.setdefault('reference_visitors', {})
+        ref_data = visitors.get(ref_entry)
+        if ref_data is None:
+            ref_data = ReferenceMessageVisitor()
+            ref_data.visit(ref_entry)
+            visitors[ref_entry] = ref_data
+        return ref_data
+
+    def locale_key(self):
+        # only the plural categories depend on the locale
+        return plurals.get_plural_rule(self.locale)
 
     def check_message(self, ref_entry, l10n_entry):
         '''Run checks on localized messages against reference message.'''
-        ref_data = ReferenceMessageVisitor()
-        ref_data.visit(ref_entry)
+        ref_data = self.reference_visitor(ref_entry)
         l10n_data = L10nMessageVisitor(self.locale, ref_data)
         l10n_data.visit(l10n_entry)
 
@@ -67,6 +67,10 @@ class PropertiesChecker(Checker):
                 yield t
             return
 
+    def locale_key(self):
+        # only the plural forms depend on the locale
+        return plurals.get_plural_rule(self.locale)
+
     def check_plural(self, refValue, l10nValue):
         '''Check for the stringbundle plurals logic.
         The common variable pattern is #1.
@@ -15,7 +15,9 @@ import sys
 from compare_locales import mozpath
 from compare_locales import version
 from compare_locales.paths import EnumerateApp, TOMLParser, ConfigNotFound
-from compare_locales.compare import compareProjects
+from compare_locales.paths.configparser import ConfigCache
+from compare_locales.paths.matcher import regex_cache
+from compare_locales.compare import compareProjects, ResultCache, JSONStream
 
 
 class CompareLocales(object):
@@ -57,12 +59,26 @@ use {ab_CD} to specify a different directory for each locale''')
         parser.add_argument('--json',
                             help='''Serialize to JSON. Value is the name of
 the output file, pass "-" to serialize to stdout and hide the default output.
+''')
+        parser.add_argument('--json-stream', metavar='FILE',
+                            help='''Write results as newline-delimited JSON,
+one record per file as soon as it's compared, followed by a summary record.
+Pass "-" to write to stdout and hide the default output.
 ''')
         parser.add_argument('-D', action='append', metavar='var=value',
                             default=[], dest='defines',
                             help='Overwrite variables in TOML files')
         parser.add_argument('--full', action="store_true",
                             help="Compare sub-projects that are disabled")
+        parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help="""Number of processes to compare locales
+in parallel""")
+        parser.add_argument('--cache-dir', metavar='DIR',
+                            help="""Cache comparison results and parsed
+configurations in this directory, and reuse them for files that didn't
+change""")
+        parser.add_argument('--clear-cache', action="store_true",
+                            help="Clear the cache directory before comparing")
         parser.add_argument('--return-zero', action="store_true",
                             help="Return 0 regardless of l10n status")
         parser.add_argument('--clobber-merge', action="store_true",
@@ -95,6 +111,9 @@ Be careful to specify the right merge directory when using this option.""")
         return_zero=False,
         clobber=False,
         json=None,
+        json_stream=None,
+        jobs=1,
+        cache_dir=None, clear_cache=False,
     ):
         """The instance part of the classmethod call.
 
@@ -123,10 +142,15 @@ Be careful to specify the right merge directory when using this option.""")
         for define in defines:
             var, _, value = define.partition('=')
             config_env[var] = value
+        if cache_dir is not None and clear_cache:
+            ResultCache(cache_dir).clear()
+            ConfigCache(cache_dir).clear()
         for config_path in config_paths:
             if config_path.endswith('.toml'):
                 try:
-                    config = TOMLParser().parse(config_path, env=config_env)
+                    config = TOMLParser(cache_dir=cache_dir).parse(
+                        config_path, env=config_env
+                    )
                 except ConfigNotFound as e:
                     self.parser.exit('config file %s not found' % e.filename)
                 if locales_deep:
@@ -139,18 +163,43 @@ Be careful to specify the right merge directory when using this option.""")
             else:
                 app = EnumerateApp(config_path, l10n_base_dir)
                 configs.append(app.asConfig())
+        show_output = json != '-' and json_stream != '-'
+        stream = None
+        if json_stream is not None:
+            stream = JSONStream(
+                sys.stdout if json_stream == '-' else open(json_stream, 'w')
+            )
         try:
             observers = compareProjects(
                 configs,
                 locales,
                 l10n_base_dir,
                 quiet=quiet,
-                merge_stage=merge, clobber_merge=clobber)
+                merge_stage=merge, clobber_merge=clobber,
+                jobs=jobs, cache_dir=cache_dir,
+                stream=stream,
+                # without output, we don't need to keep the details
+                details=show_output or json is not None)
         except (OSError, IOError) as exc:
             print("FAIL: " + str(exc))
             self.parser.exit(2)
+        finally:
+            if stream is not None and json_stream != '-':
+                stream.fh.close()
+        # pass -vv to see this
+        logging.debug('Matcher regex cache: %s', regex_cache.stats())
+        filter_caches = [
+            config.filter_caches
+            for project in configs
+            for config in project.configs
+        ]
+        logging.debug(
+            'Filter caches: %d hits, %d misses',
+            sum(caches.hits for caches in filter_caches),
+            sum(caches.misses for caches in filter_caches)
+        )
 
-        if json is None or json != '-':
+        if show_output:
             details = observers.serializeDetails()
             if details:
                 print(details)
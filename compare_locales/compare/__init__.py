@@ -6,19 +6,26 @@
 
 from __future__ import absolute_import
 from __future__ import print_function
+import logging
+import multiprocessing
 import os
 import shutil
+import sys
+
+import six
 
 from compare_locales import paths, mozpath
 
+from .cache import ReferenceCache, ResultCache
 from .content import ContentComparer
 from .observer import Observer, ObserverList
+from .stream import JSONStream
 from .utils import Tree, AddRemove
 
 
 __all__ = [
-    'ContentComparer',
-    'Observer', 'ObserverList',
+    'ContentComparer', 'ReferenceCache', 'ResultCache',
+    'Observer', 'ObserverList', 'JSONStream',
     'AddRemove', 'Tree',
     'compareProjects',
 ]
@@ -32,10 +39,63 @@ def compareProjects(
             merge_stage=None,
             clobber_merge=False,
             quiet=0,
+            jobs=1,
+            cache_dir=None,
+            stream=None,
+            details=True,
         ):
+    '''Compare the given projects for the given locales.
+
+    If a JSONStream is passed as `stream`, the results are written
+    to it while comparing, and the summaries at the end.
+    If details is False, the returned observers only have summaries.
+    '''
     all_locales = set(locales)
-    comparer = ContentComparer(quiet)
+    comparer = ContentComparer(
+        quiet, result_cache=_result_cache(cache_dir), details=details
+    )
+    file_index = paths.FileIndex()
     observers = comparer.observers
+    _add_observers(
+        observers, project_configs, locales, quiet,
+        file_results=stream is not None, details=details
+    )
+    if not locales:
+        for project in project_configs:
+            all_locales.update(project.all_locales)
+    all_locales = sorted(all_locales)
+    if jobs > 1 and len(all_locales) > 1:
+        _compare_parallel(
+            comparer, project_configs, locales, all_locales,
+            l10n_base_dir, merge_stage, clobber_merge, quiet, jobs,
+            cache_dir, stream, details
+        )
+    else:
+        for locale in all_locales:
+            _compare_locale(
+                comparer, locale, project_configs, l10n_base_dir,
+                merge_stage, clobber_merge, file_index, stream
+            )
+    if stream is not None:
+        stream.write_summary(observers)
+    logging.getLogger('compare-locales').info(
+        'Skipped parsing %d cached files and %d copies of the reference',
+        comparer.fast_path['cached'], comparer.fast_path['copies']
+    )
+    return observers
+
+
+def _result_cache(cache_dir):
+    if cache_dir is None:
+        return None
+    return ResultCache(cache_dir)
+
+
+def _add_observers(
+            observers, project_configs, locales, quiet,
+            file_results=False, details=True,
+        ):
+    '''Add one Observer per project to the given ObserverList.'''
     for project in project_configs:
         # disable filter if we're in validation mode
         if None in locales:
@@ -46,46 +106,160 @@ def compareProjects(
             Observer(
                 quiet=quiet,
                 filter=filter,
+                details=details,
+                file_results=file_results,
             ))
-        if not locales:
-            all_locales.update(project.all_locales)
-    for locale in sorted(all_locales):
-        files = paths.ProjectFiles(locale, project_configs,
-                                   mergebase=merge_stage)
-        if merge_stage is not None:
-            if clobber_merge:
-                mergematchers = set(_m.get('merge') for _m in files.matchers)
-                mergematchers.discard(None)
-                for matcher in mergematchers:
-                    clobberdir = matcher.prefix
-                    if os.path.exists(clobberdir):
-                        shutil.rmtree(clobberdir)
-                        print("clobbered " + clobberdir)
-        for l10npath, refpath, mergepath, extra_tests in files:
-            # module and file path are needed for legacy filter.py support
-            module = None
-            fpath = mozpath.relpath(l10npath, l10n_base_dir)
-            for _m in files.matchers:
-                if _m['l10n'].match(l10npath):
-                    if _m['module']:
-                        # legacy ini support, set module, and resolve
-                        # local path against the matcher prefix,
-                        # which includes the module
-                        module = _m['module']
-                        fpath = mozpath.relpath(l10npath, _m['l10n'].prefix)
-                    break
-            reffile = paths.File(refpath, fpath or refpath, module=module)
-            if locale is None:
-                # When validating the reference files, set locale
-                # to a private subtag. This only shows in the output.
-                locale = paths.REFERENCE_LOCALE
-            l10n = paths.File(l10npath, fpath or l10npath,
-                              module=module, locale=locale)
-            if not os.path.exists(l10npath):
-                comparer.add(reffile, l10n, mergepath)
-                continue
-            if not os.path.exists(refpath):
-                comparer.remove(reffile, l10n, mergepath)
-                continue
+
+
+def _compare_locale(
+            comparer,
+            locale,
+            project_configs,
+            l10n_base_dir,
+            merge_stage=None,
+            clobber_merge=False,
+            file_index=None,
+            stream=None,
+        ):
+    if file_index is None:
+        file_index = paths.FileIndex()
+    files = paths.ProjectFiles(locale, project_configs,
+                               mergebase=merge_stage,
+                               file_index=file_index)
+    if merge_stage is not None:
+        if clobber_merge:
+            mergematchers = set(_m.get('merge') for _m in files.matchers)
+            mergematchers.discard(None)
+            for matcher in mergematchers:
+                clobberdir = matcher.prefix
+                if os.path.exists(clobberdir):
+                    shutil.rmtree(clobberdir)
+                    print("clobbered " + clobberdir)
+    for l10npath, refpath, mergepath, extra_tests in files:
+        # module and file path are needed for legacy filter.py support
+        module = None
+        fpath = mozpath.relpath(l10npath, l10n_base_dir)
+        _m = files.l10n_matchers(l10npath)
+        if _m is not None and _m['module']:
+            # legacy ini support, set module, and resolve
+            # local path against the matcher prefix,
+            # which includes the module
+            module = _m['module']
+            fpath = mozpath.relpath(l10npath, _m['l10n'].prefix)
+        reffile = paths.File(refpath, fpath or refpath, module=module)
+        if locale is None:
+            # When validating the reference files, set locale
+            # to a private subtag. This only shows in the output.
+            locale = paths.REFERENCE_LOCALE
+        l10n = paths.File(l10npath, fpath or l10npath,
+                          module=module, locale=locale)
+        if not file_index.exists(l10npath):
+            comparer.add(reffile, l10n, mergepath)
+        elif not file_index.exists(refpath):
+            comparer.remove(reffile, l10n, mergepath)
+        else:
             comparer.compare(reffile, l10n, mergepath, extra_tests)
-    return observers
+        if stream is not None:
+            stream.write_files(comparer.observers)
+
+
+def _compare_parallel(
+            comparer,
+            project_configs,
+            locales,
+            all_locales,
+            l10n_base_dir,
+            merge_stage,
+            clobber_merge,
+            quiet,
+            jobs,
+            cache_dir,
+            stream,
+            details,
+        ):
+    '''Compare each locale in a worker process.
+
+    The worker results are merged into the observers of `comparer`
+    in the order of `all_locales`, and the output of each worker is
+    replayed in that order, too. Thus the results are the same as for
+    a serial run.
+    The same goes for the records of the JSONStream.
+    '''
+    pool = multiprocessing.Pool(
+        jobs,
+        initializer=_init_worker,
+        initargs=(
+            project_configs, locales, l10n_base_dir,
+            merge_stage, clobber_merge, quiet, cache_dir,
+            stream is not None, details,
+        )
+    )
+    try:
+        for output, records, fast_path, worker_observers in pool.imap(
+            _compare_in_worker, all_locales
+        ):
+            if output:
+                sys.stdout.write(output)
+            if records:
+                stream.fh.write(records)
+                stream.fh.flush()
+            comparer.fast_path.update(fast_path)
+            comparer.observers.merge(worker_observers)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# Arguments to _compare_locale, set once per worker process.
+_worker_args = None
+# Caches for the comparisons in this worker process.
+_worker_caches = None
+# Directory listings, shared by the locales of this worker process.
+_worker_file_index = None
+
+
+def _init_worker(
+            project_configs, locales, l10n_base_dir,
+            merge_stage, clobber_merge, quiet, cache_dir,
+            streaming, details,
+        ):
+    global _worker_args, _worker_caches, _worker_file_index
+    _worker_args = (
+        project_configs, locales, l10n_base_dir,
+        merge_stage, clobber_merge, quiet, streaming, details,
+    )
+    _worker_caches = (ReferenceCache(), _result_cache(cache_dir))
+    _worker_file_index = paths.FileIndex()
+
+
+def _compare_in_worker(locale):
+    (
+        project_configs, locales, l10n_base_dir,
+        merge_stage, clobber_merge, quiet, streaming, details,
+    ) = _worker_args
+    reference_cache, result_cache = _worker_caches
+    comparer = ContentComparer(
+        quiet,
+        reference_cache=reference_cache,
+        result_cache=result_cache,
+        details=details
+    )
+    _add_observers(
+        comparer.observers, project_configs, locales, quiet,
+        file_results=streaming, details=details
+    )
+    # the records are written by the main process, in order
+    stream = JSONStream(six.StringIO()) if streaming else None
+    stdout = sys.stdout
+    sys.stdout = output = six.StringIO()
+    try:
+        _compare_locale(
+            comparer, locale, project_configs, l10n_base_dir,
+            merge_stage, clobber_merge, _worker_file_index, stream
+        )
+    finally:
+        sys.stdout = stdout
+    records = stream.fh.getvalue() if streaming else None
+    return (
+        output.getvalue(), records, comparer.fast_path, comparer.observers
+    )
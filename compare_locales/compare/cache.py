@@ -0,0 +1,262 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'Caches shared between comparisons of different locales'
+
+from __future__ import absolute_import
+from collections import OrderedDict
+import errno
+import hashlib
+import json
+import os
+
+from compare_locales import parser
+from compare_locales import version
+
+
+class CachedReference(object):
+    '''A parsed reference file, and the data derived from it.
+
+    `entities` is the parser result.
+    `checker_state` is passed to Checker.set_reference, so that checkers
+    can store the data they compute from the reference.
+    `copy_events` are the events of comparing the reference with a copy,
+    by the type and Checker.locale_key of the checker, and the extra tests.
+    '''
+    def __init__(self, entities, stamp, path=None):
+        self.entities = entities
+        self.stamp = stamp
+        self.path = path
+        self.checker_state = {}
+        self.copy_events = {}
+        self._word_counts = None
+        self._file_stats = None
+        self._digest = None
+
+    @property
+    def size(self):
+        return self.stamp[1]
+
+    def count_words(self, key):
+        '''Word count of the reference entity with the given key.'''
+        if self._word_counts is None:
+            self._count_words()
+        try:
+            return self._word_counts[key]
+        except KeyError:
+            return self.entities[key].count_words()
+
+    def file_stats(self):
+        '''Number of entities and words, for a missing file.'''
+        if self._file_stats is None:
+            self._count_words()
+        return self._file_stats
+
+    def _count_words(self):
+        # count the words of all entities at once
+        entities = [
+            e for e in self.entities if not isinstance(e, parser.Junk)
+        ]
+        counts = parser.count_words(entities)
+        self._word_counts = dict(zip((e.key for e in entities), counts))
+        self._file_stats = (len(entities), sum(counts))
+
+    def is_copy(self, path):
+        '''Check if the file at the given path is a copy of the reference.
+
+        A copy parses to the same entities as the reference, so we
+        can compare against those instead of parsing it.
+        The file contents are compared by their hash, if the sizes
+        match. Files with Junk are never a copy, as the keys
+        of Junk differ between parser runs.
+        '''
+        if self.path is None:
+            return False
+        try:
+            if os.path.getsize(path) != self.size:
+                return False
+            digest = _digest(path)
+            if self._digest is None:
+                self._digest = _digest(self.path)
+        except EnvironmentError:
+            return False
+        if digest != self._digest:
+            return False
+        return not any(isinstance(e, parser.Junk) for e in self.entities)
+
+
+def _digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+class ReferenceCache(object):
+    '''LRU cache of parsed reference files.
+
+    The reference files are the same for each locale, so we only
+    parse them once per run.
+    Cache entries are keyed by the full path of the reference file, and
+    are reused while the modification time and size of the file don't
+    change. If the accumulated size of the cached files exceeds `max_size`
+    bytes, the least recently used entries are dropped.
+    '''
+    def __init__(self, max_size=16 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, p, ref_file):
+        '''Get the CachedReference for the given File.
+
+        Use the Parser `p` to parse the file if it's not cached.
+        This raises the same exceptions as Parser.readFile.
+        '''
+        path = ref_file.fullpath
+        st = os.stat(path)
+        stamp = (st.st_mtime, st.st_size)
+        cached = self._cache.pop(path, None)
+        if cached is not None:
+            if cached.stamp == stamp:
+                # re-insert as most recently used
+                self._cache[path] = cached
+                return cached
+            self.size -= cached.size
+        p.readFile(ref_file)
+        cached = CachedReference(p.parse(), stamp, path)
+        self._cache[path] = cached
+        self.size += cached.size
+        while self._cache and self.size > self.max_size:
+            _, dropped = self._cache.popitem(last=False)
+            self.size -= dropped.size
+        return cached
+
+    def clear(self):
+        self._cache.clear()
+        self.size = 0
+
+
+class ResultCache(object):
+    '''On-disk cache of comparison results.
+
+    The results are the events of ContentComparer.compare_entities.
+    They're keyed by the contents of the reference and the localized file,
+    the checks to run on them, and the version of compare-locales.
+    The filters of the project configuration are applied when replaying
+    the events, so they're not part of the key.
+
+    The least recently used entries are removed if the cache grows
+    beyond `max_size` bytes. Use `clear` to invalidate the whole cache.
+    '''
+    def __init__(self, cache_dir, max_size=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._size = None
+
+    def key(self, ref_file, l10n, extra_tests):
+        '''Create the cache key for comparing the given files.
+
+        Returns None if the files can't be read.
+        '''
+        key = hashlib.sha1()
+        for part in (
+            version,
+            ref_file.file,
+            l10n.file,
+            l10n.locale or '',
+            ' '.join(sorted(extra_tests or [])),
+        ):
+            key.update(part.encode('utf-8') + b'\0')
+        try:
+            for path in (ref_file.fullpath, l10n.fullpath):
+                with open(path, 'rb') as f:
+                    key.update(hashlib.sha1(f.read()).digest())
+        except EnvironmentError:
+            return None
+        return key.hexdigest()
+
+    def get(self, key):
+        '''Get the cached events for the given key, or None.'''
+        if key is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                events = json.load(f)
+            # mark as recently used
+            os.utime(path, None)
+        except (EnvironmentError, ValueError):
+            return None
+        for i, event in enumerate(events):
+            if len(event) > 1 and isinstance(event[1], list):
+                # entity ids in PO files are tuples
+                event[1] = tuple(event[1])
+            events[i] = tuple(event)
+        return events
+
+    def set(self, key, events):
+        '''Store the events for the given key.'''
+        if key is None:
+            return
+        try:
+            os.makedirs(self.cache_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        path = self._path(key)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(events, f)
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_size:
+            self.prune()
+
+    def prune(self):
+        '''Remove the least recently used entries.
+
+        We remove entries until the cache is at three quarters of
+        its maximum size, so we don't need to prune on every store.
+        '''
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_size * 3 // 4:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # removed by somebody else
+                pass
+            self._size -= size
+
+    def clear(self):
+        '''Remove all entries.'''
+        for _, _, path in self._entries():
+            os.remove(path)
+        self._size = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def _entries(self):
+        '''Tuples of modification time, size, and path of all entries.'''
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield st.st_mtime, st.st_size, path
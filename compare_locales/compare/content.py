@@ -7,15 +7,19 @@
 from __future__ import absolute_import
 from __future__ import print_function
 import codecs
+from collections import Counter
 import os
 import shutil
 import re
 
+import six
+
 from compare_locales import parser
 from compare_locales import mozpath
 from compare_locales.checks import getChecker, EntityPos
 from compare_locales.keyedtuple import KeyedTuple
 
+from .cache import ReferenceCache
 from .observer import ObserverList
 from .utils import AddRemove
 
@@ -24,13 +28,27 @@ class ContentComparer:
     keyRE = re.compile('[kK]ey')
     nl = re.compile('\n', re.M)
 
-    def __init__(self, quiet=0):
+    def __init__(
+        self, quiet=0, reference_cache=None, result_cache=None, details=True
+    ):
         '''Create a ContentComparer.
         observer is usually a instance of Observer. The return values
         of the notify method are used to control the handling of missing
         entities.
+        reference_cache is a ReferenceCache shared between all comparisons,
+        pass one to configure its size.
+        result_cache is an optional ResultCache. Results of comparisons
+        without merging are stored there, and replayed for unchanged files.
+        If details is False, the observers only keep the summaries.
         '''
-        self.observers = ObserverList(quiet=quiet)
+        self.observers = ObserverList(quiet=quiet, details=details)
+        if reference_cache is None:
+            reference_cache = ReferenceCache()
+        self.reference_cache = reference_cache
+        self.result_cache = result_cache
+        # Number of files compared without parsing them, by reason:
+        # `cached` results, and `copies` of the reference.
+        self.fast_path = Counter()
 
     def create_merge_dir(self, merge_file):
         outdir = mozpath.dirname(merge_file)
@@ -132,8 +150,16 @@ class ContentComparer:
         )
 
     def compare(self, ref_file, l10n, merge_file, extra_tests=None):
+        cache_key = None
+        if self.result_cache is not None and merge_file is None:
+            cache_key = self.result_cache.key(ref_file, l10n, extra_tests)
+            events = self.result_cache.get(cache_key)
+            if events is not None:
+                self.fast_path['cached'] += 1
+                self.report(l10n, events)
+                return
         try:
-            p = parser.getParser(ref_file.file)
+            p = parser.createParser(ref_file.file)
         except UserWarning:
             # no comparison, XXX report?
             # At least, merge
@@ -142,11 +168,23 @@ class ContentComparer:
                 parser.CAN_COPY, None)
             return
         try:
-            p.readFile(ref_file)
+            ref = self.reference_cache.get(p, ref_file)
         except Exception as e:
             self.observers.notify('error', ref_file, str(e))
             return
-        ref_entities = p.parse()
+        ref_entities = ref.entities
+        checker = getChecker(l10n, extra_tests=extra_tests)
+        if (
+            merge_file is None
+            and not self._overrides_doUnchanged()
+            and ref.is_copy(l10n.fullpath)
+        ):
+            self.fast_path['copies'] += 1
+            events = self.copy_events(p, ref_file, ref, checker, extra_tests)
+            self.report(l10n, events)
+            if cache_key is not None:
+                self.result_cache.set(cache_key, events)
+            return
         try:
             p.readFile(l10n)
             l10n_entities = p.parse()
@@ -155,72 +193,106 @@ class ContentComparer:
             self.observers.notify('error', l10n, str(e))
             return
 
+        # skips are only collected if we merge
+        skips = [] if merge_file is not None else None
+        if checker and checker.needs_reference:
+            checker.set_reference(ref_entities, state=ref.checker_state)
+        events = list(self.compare_entities(
+            p, ref_file, ref, l10n_entities, checker, skips
+        ))
+        missings = self.report(l10n, events)
+
+        if merge_file is not None:
+            self.merge(
+                ref_entities, ref_file,
+                l10n, merge_file, missings, skips, l10n_ctx,
+                p.capabilities, p.encoding)
+        elif cache_key is not None:
+            self.result_cache.set(cache_key, events)
+
+    def _overrides_doUnchanged(self):
+        # copies of the reference replay events without calling the hook
+        return (
+            six.get_unbound_function(type(self).doUnchanged) is not
+            six.get_unbound_function(ContentComparer.doUnchanged)
+        )
+
+    def copy_events(self, p, ref_file, ref, checker, extra_tests):
+        '''Get the events for a localized file that's a copy of the
+        reference.
+
+        Those only depend on the checks, so we compare the reference
+        with itself once for each kind of checker and keep the events.
+        '''
+        key = (
+            type(checker),
+            checker.locale_key() if checker else None,
+            tuple(sorted(extra_tests or [])),
+        )
+        events = ref.copy_events.get(key)
+        if events is None:
+            if checker and checker.needs_reference:
+                checker.set_reference(ref.entities, state=ref.checker_state)
+            events = ref.copy_events[key] = list(self.compare_entities(
+                p, ref_file, ref, ref.entities, checker, None
+            ))
+        return events
+
+    def compare_entities(self, p, ref_file, ref, l10n_entities, checker,
+                         skips):
+        '''Compare the entities in a reference and a localized file.
+
+        This is a generator of events, which are tuples of a category
+        and its data:
+        - `error` and `warning` with a message
+        - `missingEntity` with the entity id and the word count
+        - `obsoleteEntity` with the entity id
+        - `keys`
+        - `changed` and `unchanged` with the word count
+        These events don't depend on the filters of the observers,
+        ContentComparer.report notifies the observers about them.
+        If `skips` is a list, entities to skip when merging are added to it.
+        '''
+        ref_entities = ref.entities
         ar = AddRemove()
         ar.set_left(ref_entities.keys())
         ar.set_right(l10n_entities.keys())
-        report = missing = obsolete = changed = unchanged = keys = 0
-        missing_w = changed_w = unchanged_w = 0  # word stats
-        missings = []
-        skips = []
-        checker = getChecker(l10n, extra_tests=extra_tests)
-        if checker and checker.needs_reference:
-            checker.set_reference(ref_entities)
         for msg in p.findDuplicates(ref_entities):
-            self.observers.notify('warning', l10n, msg)
+            yield ('warning', msg)
         for msg in p.findDuplicates(l10n_entities):
-            self.observers.notify('error', l10n, msg)
+            yield ('error', msg)
         for action, entity_id in ar:
             if action == 'delete':
                 # missing entity
                 if isinstance(ref_entities[entity_id], parser.Junk):
-                    self.observers.notify(
-                        'warning', l10n, 'Parser error in en-US'
-                    )
-                    continue
-                _rv = self.observers.notify('missingEntity', l10n, entity_id)
-                if _rv == "ignore":
+                    yield ('warning', 'Parser error in en-US')
                     continue
-                if _rv == "error":
-                    # only add to missing entities for l10n-merge on error,
-                    # not report
-                    missings.append(entity_id)
-                    missing += 1
-                    refent = ref_entities[entity_id]
-                    missing_w += refent.count_words()
-                else:
-                    # just report
-                    report += 1
+                yield (
+                    'missingEntity', entity_id, ref.count_words(entity_id)
+                )
             elif action == 'add':
                 # obsolete entity or junk
                 if isinstance(l10n_entities[entity_id],
                               parser.Junk):
                     junk = l10n_entities[entity_id]
-                    self.observers.notify(
-                        'error', l10n,
-                        junk.error_message()
-                    )
-                    if merge_file is not None:
+                    yield ('error', junk.error_message())
+                    if skips is not None:
                         skips.append(junk)
-                elif (
-                    self.observers.notify('obsoleteEntity', l10n, entity_id)
-                    != 'ignore'
-                ):
-                    obsolete += 1
+                else:
+                    yield ('obsoleteEntity', entity_id)
             else:
                 # entity found in both ref and l10n, check for changed
                 refent = ref_entities[entity_id]
                 l10nent = l10n_entities[entity_id]
                 if self.keyRE.search(entity_id):
-                    keys += 1
+                    yield ('keys',)
                 else:
                     if refent.equals(l10nent):
                         self.doUnchanged(l10nent)
-                        unchanged += 1
-                        unchanged_w += refent.count_words()
+                        yield ('unchanged', ref.count_words(entity_id))
                     else:
                         self.doChanged(ref_file, refent, l10nent)
-                        changed += 1
-                        changed_w += refent.count_words()
+                        yield ('changed', ref.count_words(entity_id))
                         # run checks:
                 if checker:
                     for tp, pos, msg, cat in checker.check(refent, l10nent):
@@ -229,20 +301,55 @@ class ContentComparer:
                         else:
                             line, col = l10nent.value_position(pos)
                         # skip error entities when merging
-                        if tp == 'error' and merge_file is not None:
+                        if tp == 'error' and skips is not None:
                             skips.append(l10nent)
-                        self.observers.notify(
-                            tp, l10n,
+                        yield (
+                            tp,
                             u"%s at line %d, column %d for %s" %
                             (msg, line, col, refent.key)
                         )
-                pass
 
-        if merge_file is not None:
-            self.merge(
-                ref_entities, ref_file,
-                l10n, merge_file, missings, skips, l10n_ctx,
-                p.capabilities, p.encoding)
+    def report(self, l10n, events):
+        '''Notify the observers about the events of compare_entities,
+        and update the stats for the localized file.
+
+        Returns the list of missing entity ids to merge.
+        '''
+        report = missing = obsolete = changed = unchanged = keys = 0
+        missing_w = changed_w = unchanged_w = 0  # word stats
+        missings = []
+        for event in events:
+            category = event[0]
+            if category == 'missingEntity':
+                entity_id = event[1]
+                _rv = self.observers.notify('missingEntity', l10n, entity_id)
+                if _rv == "ignore":
+                    continue
+                if _rv == "error":
+                    # only add to missing entities for l10n-merge on error,
+                    # not report
+                    missings.append(entity_id)
+                    missing += 1
+                    missing_w += event[2]
+                else:
+                    # just report
+                    report += 1
+            elif category == 'obsoleteEntity':
+                if (
+                    self.observers.notify('obsoleteEntity', l10n, event[1])
+                    != 'ignore'
+                ):
+                    obsolete += 1
+            elif category == 'keys':
+                keys += 1
+            elif category == 'unchanged':
+                unchanged += 1
+                unchanged_w += event[1]
+            elif category == 'changed':
+                changed += 1
+                changed_w += event[1]
+            else:
+                self.observers.notify(category, l10n, event[1])
 
         stats = {
             'missing': missing,
@@ -256,13 +363,13 @@ class ContentComparer:
             'keys': keys,
         }
         self.observers.updateStats(l10n, stats)
-        pass
+        return missings
 
     def add(self, orig, missing, merge_file):
         ''' Add missing localized file.'''
         f = orig
         try:
-            p = parser.getParser(f.file)
+            p = parser.createParser(f.file)
         except UserWarning:
             p = None
 
@@ -285,23 +392,23 @@ class ContentComparer:
             return
 
         try:
-            p.readFile(f)
-            entities = p.parse()
+            ref = self.reference_cache.get(p, f)
         except Exception as ex:
             self.observers.notify('error', f, str(ex))
             return
-        # strip parse errors
-        entities = [e for e in entities if not isinstance(e, parser.Junk)]
-        self.observers.updateStats(missing, {'missing': len(entities)})
-        missing_w = 0
-        for e in entities:
-            missing_w += e.count_words()
+        # parse errors are stripped from the stats
+        missing_count, missing_w = ref.file_stats()
+        self.observers.updateStats(missing, {'missing': missing_count})
         self.observers.updateStats(missing, {'missing_w': missing_w})
 
     def doUnchanged(self, entity):
         # overload this if needed
+        # Not called for results replayed from a ResultCache.
+        # Copies of the reference are compared entity by entity if
+        # this is overloaded.
         pass
 
     def doChanged(self, file, ref_entity, l10n_entity):
         # overload this if needed
+        # Not called for results replayed from a ResultCache.
         pass
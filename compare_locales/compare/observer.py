@@ -6,38 +6,70 @@
 
 from __future__ import absolute_import
 from __future__ import print_function
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import six
 
 from .utils import Tree
 
 
+def _empty_summary():
+    # module level, so that Observer summaries can be pickled
+    return {
+        "errors": 0,
+        "warnings": 0,
+        "missing": 0,
+        "missing_w": 0,
+        "report": 0,
+        "obsolete": 0,
+        "changed": 0,
+        "changed_w": 0,
+        "unchanged": 0,
+        "unchanged_w": 0,
+        "keys": 0,
+    }
+
+
 class Observer(object):
 
-    def __init__(self, quiet=0, filter=None):
+    def __init__(
+        self, quiet=0, filter=None, details=True, file_results=False
+    ):
         '''Create Observer
         For quiet=1, skip per-entity missing and obsolete strings,
         for quiet=2, skip missing and obsolete files. For quiet=3,
         skip warnings and errors.
+        If details is False, don't keep the details for the whole run.
+        If file_results is True, collect the details and stats per file,
+        see pop_file_results.
         '''
-        self.summary = defaultdict(lambda: {
-            "errors": 0,
-            "warnings": 0,
-            "missing": 0,
-            "missing_w": 0,
-            "report": 0,
-            "obsolete": 0,
-            "changed": 0,
-            "changed_w": 0,
-            "unchanged": 0,
-            "unchanged_w": 0,
-            "keys": 0,
-        })
-        self.details = Tree(list)
+        self.summary = defaultdict(_empty_summary)
+        self.details = Tree(list) if details else None
+        self.file_results = OrderedDict() if file_results else None
         self.quiet = quiet
         self.filter = filter
         self.error = False
 
+    def __getstate__(self):
+        # The filter is usually bound to a ProjectConfig, and only
+        # needed while comparing. Don't pickle it.
+        state = self.__dict__.copy()
+        state['filter'] = None
+        return state
+
+    def merge(self, other):
+        '''Merge the results of another Observer into this one.
+
+        This is used to collect the results of parallel runs.
+        The other Observer is expected to cover other locales.
+        '''
+        for locale, summary in six.iteritems(other.summary):
+            for category, value in six.iteritems(summary):
+                self.summary[locale][category] += value
+        if self.details is not None:
+            for path, value in other.details.items():
+                self.details[path].extend(value)
+        self.error = self.error or other.error
+
     def _dictify(self, d):
         plaindict = {}
         for k, v in six.iteritems(d):
@@ -52,6 +84,31 @@ class Observer(object):
             'details': self.details.toJSON()
         }
 
+    def pop_file_results(self):
+        '''Return the results collected per file, and start over.
+
+        The results are an ordered dictionary of File objects to
+        dictionaries with the `details` and `stats` of that file.
+        '''
+        results = self.file_results
+        self.file_results = OrderedDict()
+        return results
+
+    def _file_result(self, file):
+        result = self.file_results.get(file)
+        if result is None:
+            result = self.file_results[file] = {
+                'details': [],
+                'stats': {},
+            }
+        return result
+
+    def _add_detail(self, file, detail):
+        if self.details is not None:
+            self.details[file].append(detail)
+        if self.file_results is not None:
+            self._file_result(file)['details'].append(detail)
+
     def updateStats(self, file, stats):
         # in multi-project scenarios, this file might not be ours,
         # check that.
@@ -66,7 +123,13 @@ class Observer(object):
                 # updateStats isn't called with `errors`, but make sure
                 # we handle this if that changes
                 self.error = True
-            self.summary[file.locale][category] += value
+            self._count(file, category, value)
+
+    def _count(self, file, category, value):
+        self.summary[file.locale][category] += value
+        if self.file_results is not None:
+            stats = self._file_result(file)['stats']
+            stats[category] = stats.get(category, 0) + value
 
     def notify(self, category, file, data):
         rv = 'error'
@@ -76,7 +139,7 @@ class Observer(object):
             if rv == "ignore" or self.quiet >= 2:
                 return rv
             if self.quiet == 0 or category == 'missingFile':
-                self.details[file].append({category: rv})
+                self._add_detail(file, {category: rv})
             return rv
         if self.filter is not None:
             rv = self.filter(file, data)
@@ -87,7 +150,7 @@ class Observer(object):
                 (category == 'missingEntity' and self.quiet < 2)
                 or (category == 'obsoleteEntity' and self.quiet < 1)
             ):
-                self.details[file].append({category: data})
+                self._add_detail(file, {category: data})
             return rv
         if category == 'error':
             # Set error independently of quiet
@@ -97,14 +160,14 @@ class Observer(object):
                 (category == 'error' and self.quiet < 4)
                 or (category == 'warning' and self.quiet < 3)
             ):
-                self.details[file].append({category: data})
-            self.summary[file.locale][category + 's'] += 1
+                self._add_detail(file, {category: data})
+            self._count(file, category + 's', 1)
         return rv
 
 
 class ObserverList(Observer):
-    def __init__(self, quiet=0):
-        super(ObserverList, self).__init__(quiet=quiet)
+    def __init__(self, quiet=0, details=True):
+        super(ObserverList, self).__init__(quiet=quiet, details=details)
         self.observers = []
 
     def __iter__(self):
@@ -113,6 +176,11 @@ class ObserverList(Observer):
     def append(self, observer):
         self.observers.append(observer)
 
+    def merge(self, other):
+        super(ObserverList, self).merge(other)
+        for observer, other_observer in zip(self.observers, other.observers):
+            observer.merge(other_observer)
+
     def notify(self, category, file, data):
         """Check observer for the found data, and if it's
         not to ignore, notify stat_observers.
@@ -0,0 +1,57 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'Mozilla l10n compare locales tool'
+
+from __future__ import absolute_import
+import json
+
+import six
+
+
+class JSONStream(object):
+    '''Write results as newline-delimited JSON, while comparing.
+
+    There's one record for each file and project with results,
+    as soon as the file is compared:
+
+        {"project": 0, "locale": "de", "path": "de/browser/foo.ftl",
+         "details": [{"missingEntity": "bar"}], "stats": {"missing": 1}}
+
+    The last record has the summaries of all projects, like
+    Observer.toJSON:
+
+        {"summary": [{"de": {"missing": 1}}]}
+
+    The Observers need to collect file results, see Observer.
+    '''
+    def __init__(self, fh):
+        self.fh = fh
+
+    def write(self, record):
+        self.fh.write(json.dumps(record, sort_keys=True) + '\n')
+        self.fh.flush()
+
+    def write_files(self, observers):
+        '''Write the file results collected by the observers so far.'''
+        for project, observer in enumerate(observers):
+            for file, result in six.iteritems(observer.pop_file_results()):
+                record = {
+                    'project': project,
+                    'locale': file.locale,
+                    'path': file.localpath,
+                }
+                record.update(result)
+                self.write(record)
+
+    def write_summary(self, observers):
+        self.write({
+            'summary': [
+                {
+                    locale: dict(summary)
+                    for locale, summary in six.iteritems(observer.summary)
+                }
+                for observer in observers
+            ]
+        })
@@ -8,14 +8,21 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import six
-from six.moves import zip
 
 from compare_locales import paths
 
 
 class Tree(object):
+    '''Tree of values, keyed by paths.
+
+    The branches are keyed by tuples of path segments. Path segments
+    shared by all paths in a branch are compressed into one key, and
+    thus no two keys of a Tree start with the same segment.
+    '''
     def __init__(self, valuetype):
         self.branches = dict()
+        # first segment -> key in self.branches
+        self._first = dict()
         self.valuetype = valuetype
         self.value = None
 
@@ -28,38 +35,35 @@ class Tree(object):
             parts += leaf.file.split('/')
         else:
             parts = leaf.split('/')
-        return self.__get(parts)
+        return self.__get(tuple(parts))
 
     def __get(self, parts):
-        common = None
-        old = None
-        new = tuple(parts)
         t = self
-        for k, v in six.iteritems(self.branches):
-            for i, part in enumerate(zip(k, parts)):
-                if part[0] != part[1]:
-                    i -= 1
-                    break
-            if i < 0:
-                continue
-            i += 1
-            common = tuple(k[:i])
-            old = tuple(k[i:])
-            new = tuple(parts[i:])
-            break
-        if old:
-            self.branches.pop(k)
-            t = Tree(self.valuetype)
-            t.branches[old] = v
-            self.branches[common] = t
-        elif common:
-            t = self.branches[common]
-        if new:
-            if common:
-                return t.__get(new)
-            t2 = t
-            t = Tree(self.valuetype)
-            t2.branches[new] = t
+        while parts:
+            key = t._first.get(parts[0])
+            if key is None:
+                # no branch shares a prefix with us, add our own
+                branch = t.branches[parts] = Tree(self.valuetype)
+                t._first[parts[0]] = parts
+                t = branch
+                break
+            common = 1
+            while (
+                common < len(key) and common < len(parts)
+                and key[common] == parts[common]
+            ):
+                common += 1
+            if common < len(key):
+                # split the existing branch at the common prefix
+                branch = Tree(self.valuetype)
+                branch.branches[key[common:]] = t.branches.pop(key)
+                branch._first[key[common]] = key[common:]
+                t.branches[key[:common]] = branch
+                t._first[parts[0]] = key[:common]
+            else:
+                branch = t.branches[key]
+            t = branch
+            parts = parts[common:]
         if t.value is None:
             t.value = t.valuetype()
         return t.value
@@ -80,6 +84,17 @@ class Tree(object):
             for child in self.branches[key].getContent(depth + 1):
                 yield child
 
+    def items(self):
+        '''
+        Returns iterator of (path, value) tuples for all values in
+        this Tree, with the path segments joined by '/'.
+        '''
+        if self.value is not None:
+            yield '', self.value
+        for key, branch in six.iteritems(self.branches):
+            for path, value in branch.items():
+                yield '/'.join(key + ((path,) if path else ())), value
+
     def toJSON(self):
         '''
         Returns this Tree as a JSON-able tree of hashes.
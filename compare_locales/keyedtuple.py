@@ -13,11 +13,16 @@ case of PO. Support both.
 In the interfaces that check for membership, dicts check keys and
 sequences check values. Always try our dict cache `__map` first,
 and fall back to the superclass implementation.
+
+The dict cache is created on the first lookup by key, callers which
+only iterate don't pay for it.
 '''
 
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import six
+
 
 class KeyedTuple(tuple):
 
@@ -25,14 +30,19 @@ class KeyedTuple(tuple):
         return super(KeyedTuple, cls).__new__(cls, iterable)
 
     def __init__(self, iterable):
-        self.__map = {}
-        if iterable:
+        self.__map = None
+
+    @property
+    def _map(self):
+        if self.__map is None:
+            self.__map = {}
             for index, item in enumerate(self):
                 self.__map[item.key] = index
+        return self.__map
 
     def __contains__(self, key):
         try:
-            contains = key in self.__map
+            contains = key in self._map
             if contains:
                 return True
         except TypeError:
@@ -40,8 +50,10 @@ class KeyedTuple(tuple):
         return super(KeyedTuple, self).__contains__(key)
 
     def __getitem__(self, key):
+        if isinstance(key, six.integer_types + (slice,)):
+            return super(KeyedTuple, self).__getitem__(key)
         try:
-            key = self.__map[key]
+            key = self._map[key]
         except (KeyError, TypeError):
             pass
         return super(KeyedTuple, self).__getitem__(key)
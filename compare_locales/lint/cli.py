@@ -51,6 +51,11 @@ def main():
         help='check for conflicts against a reference project like '
         'android-l10n',
     )
+    p.add_argument(
+        '--cache-dir',
+        metavar='DIR',
+        help='cache the parsed l10n.toml files in this directory',
+    )
     args = p.parse_args()
     if args.l10n_reference:
         l10n_base, locale = \
@@ -60,7 +65,9 @@ def main():
     else:
         l10n_base = '.'
         locale = None
-    pc = paths.TOMLParser().parse(args.l10n_toml, env={'l10n_base': l10n_base})
+    pc = paths.TOMLParser(cache_dir=args.cache_dir).parse(
+        args.l10n_toml, env={'l10n_base': l10n_base}
+    )
     if locale:
         pc.set_locales([locale], deep=True)
     files = paths.ProjectFiles(locale, [pc])
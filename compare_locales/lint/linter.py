@@ -23,7 +23,7 @@ class L10nLinter(object):
         return results
 
     def lint_file(self, path, ref, extra_tests):
-        file_parser = parser.getParser(path)
+        file_parser = parser.createParser(path)
         if ref is not None and os.path.isfile(ref):
             file_parser.readFile(ref)
             reference = file_parser.parse()
@@ -31,7 +31,7 @@ class MergeNotSupportedError(ValueError):
 
 def merge_channels(name, resources):
     try:
-        parser = cl.getParser(name)
+        parser = cl.createParser(name)
     except UserWarning:
         raise MergeNotSupportedError(
             'Unsupported file format ({}).'.format(name))
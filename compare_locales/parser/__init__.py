@@ -5,11 +5,12 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 import re
+import threading
 
 from .base import (
     CAN_NONE, CAN_COPY, CAN_SKIP, CAN_MERGE,
     Entry, Entity, Comment, OffsetComment, Junk, Whitespace,
-    BadEntity, Parser,
+    BadEntity, Parser, count_words,
 )
 from .android import (
     AndroidParser
@@ -36,7 +37,7 @@ from .properties import (
 __all__ = [
     "CAN_NONE", "CAN_COPY", "CAN_SKIP", "CAN_MERGE",
     "Junk", "Entry", "Entity", "Whitespace", "Comment", "OffsetComment",
-    "BadEntity", "Parser",
+    "BadEntity", "Parser", "count_words",
     "AndroidParser",
     "DefinesParser", "DefinesInstruction",
     "DTDParser", "DTDEntity",
@@ -48,36 +49,99 @@ __all__ = [
 ]
 
 __constructors = []
+# Parser instances keep state while parsing, share them per thread only
+_thread_parsers = threading.local()
+# Parser plugins, resolved on first use
+_plugins = None
 
 
 def getParser(path):
-    for item in __constructors:
-        if re.search(item[0], path):
-            return item[1]
+    '''Get the Parser for the given path.
+
+    The returned Parser is shared with other callers in the same thread.
+    Use createParser to get a Parser instance of your own.
+    '''
+    cls = _getParserClass(path)
     try:
-        from pkg_resources import iter_entry_points
-        for entry_point in iter_entry_points('compare_locales.parsers'):
-            p = entry_point.resolve()()
-            if p.use(path):
-                return p
-    except (ImportError, IOError):
-        pass
-    raise UserWarning("Cannot find Parser")
+        parsers = _thread_parsers.parsers
+    except AttributeError:
+        parsers = _thread_parsers.parsers = {}
+    if cls not in parsers:
+        parsers[cls] = cls()
+    return parsers[cls]
+
+
+def createParser(path):
+    '''Create a new Parser instance for the given path.
+    '''
+    return _getParserClass(path)()
 
 
 def hasParser(path):
     try:
-        return bool(getParser(path))
+        return bool(_getParserClass(path))
     except UserWarning:
         return False
 
 
+def _getParserClass(path):
+    for pattern, cls in __constructors:
+        if pattern.search(path):
+            return cls
+    for cls, plugin in _getPlugins():
+        if plugin.use(path):
+            return cls
+    raise UserWarning("Cannot find Parser")
+
+
+def _getPlugins():
+    '''Get the parser classes registered for compare_locales.parsers
+    entry points, together with an instance to call `use` on.
+
+    Plugins are only resolved once, and only when a path isn't handled
+    by our own parsers.
+    '''
+    global _plugins
+    if _plugins is None:
+        plugins = []
+        try:
+            for entry_point in _iter_entry_points('compare_locales.parsers'):
+                # pkg_resources has resolve() to skip requirement checks
+                load = getattr(entry_point, 'resolve', entry_point.load)
+                cls = load()
+                plugins.append((cls, cls()))
+        except (ImportError, IOError):
+            pass
+        _plugins = plugins
+    return _plugins
+
+
+def _iter_entry_points(group):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            entry_points = None
+    if entry_points is None:
+        from pkg_resources import iter_entry_points
+        return iter_entry_points(group)
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        return eps.select(group=group)
+    return eps.get(group, [])
+
+
 __constructors = [
-    ('strings.*\\.xml$', AndroidParser()),
-    ('\\.dtd$', DTDParser()),
-    ('\\.properties$', PropertiesParser()),
-    ('\\.ini$', IniParser()),
-    ('\\.inc$', DefinesParser()),
-    ('\\.ftl$', FluentParser()),
-    ('\\.pot?$', PoParser()),
+    (re.compile(pattern), cls)
+    for pattern, cls in (
+        ('strings.*\\.xml$', AndroidParser),
+        ('\\.dtd$', DTDParser),
+        ('\\.properties$', PropertiesParser),
+        ('\\.ini$', IniParser),
+        ('\\.inc$', DefinesParser),
+        ('\\.ftl$', FluentParser),
+        ('\\.pot?$', PoParser),
+    )
 ]
@@ -8,14 +8,16 @@ Parses strings.xml files per
 https://developer.android.com/guide/topics/resources/localization.
 As we're using a built-in XML parser underneath, errors on that level
 break the full parsing, and result in a single Junk entry.
+The document is parsed with expat, and the entries refer to their
+spans in the original text.
 """
 
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import re
-from xml.dom import minidom
-from xml.dom.minidom import Node
+from xml.dom import Node
+from xml.parsers import expat
 
 from .base import (
     CAN_SKIP,
@@ -26,32 +28,19 @@ from .base import (
 
 
 class AndroidEntity(Entity):
-    def __init__(
-        self, ctx, pre_comment, white_space, node, all, key, raw_val, val
-    ):
-        # fill out superclass as good as we can right now
-        # most span can get modified at endElement
+    __slots__ = ('node', '_key_literal', '_raw_val_literal')
+
+    def __init__(self, ctx, pre_comment, white_space, node):
         super(AndroidEntity, self).__init__(
             ctx, pre_comment, white_space,
-            (None, None),
-            (None, None),
-            (None, None)
+            node.span,
+            node.attribute_span('name'),
+            node.inner_span
         )
         self.node = node
-        self._all_literal = all
-        self._key_literal = key
-        self._raw_val_literal = raw_val
-        self._val_literal = val
-
-    @property
-    def all(self):
-        chunks = []
-        if self.pre_comment is not None:
-            chunks.append(self.pre_comment.all)
-        if self.inner_white is not None:
-            chunks.append(self.inner_white.all)
-        chunks.append(self._all_literal)
-        return ''.join(chunks)
+        # the key and value are decoded, keep them
+        self._key_literal = node.getAttribute('name')
+        self._raw_val_literal = textContent(node)
 
     @property
     def key(self):
@@ -61,31 +50,45 @@ class AndroidEntity(Entity):
     def raw_val(self):
         return self._raw_val_literal
 
-    def position(self, offset=0):
-        return (0, offset)
-
-    def value_position(self, offset=0):
-        return (0, offset)
-
     def wrap(self, raw_val):
-        clone = self.node.cloneNode(True)
-        if clone.childNodes.length == 1:
-            child = clone.childNodes[0]
+        node = self.node
+        child = None
+        if len(node.childNodes) == 1:
+            child = node.childNodes[0]
         else:
-            for child in clone.childNodes:
+            for child in node.childNodes:
                 if child.nodeType == Node.CDATA_SECTION_NODE:
                     break
-        child.data = raw_val
-        all = []
-        if self.pre_comment is not None:
-            all.append(self.pre_comment.all)
-        if self.inner_white is not None:
-            all.append(self.inner_white.all)
-        all.append(clone.toxml())
-        return LiteralEntity(self.key, raw_val, ''.join(all))
+        contents = self.ctx.contents
+        head = contents[self._span_start():self.span[0]]
+        if child is not None and child.nodeType == Node.CDATA_SECTION_NODE:
+            value = '<![CDATA[' + raw_val + ']]>'
+            start, end = child.span
+        elif child is not None and child.nodeType == Node.TEXT_NODE:
+            value = escape(raw_val)
+            start, end = child.span
+        else:
+            # replace all of the content
+            value = escape(raw_val)
+            start, end = node.inner_span
+        if start == self.span[1]:
+            # empty element tag
+            all = '{}{}>{}</{}>'.format(
+                head, contents[self.span[0]:start - 2], value, node.nodeName
+            )
+        else:
+            all = (
+                head + contents[self.span[0]:start] + value +
+                contents[end:self.span[1]]
+            )
+        return LiteralEntity(self.key, raw_val, all)
 
 
 class NodeMixin(object):
+    # The slots for the literals are defined on the concrete classes,
+    # mixing in a base with slots of its own doesn't work.
+    __slots__ = ()
+
     def __init__(self, all, value):
         self._all_literal = all
         self._val_literal = value
@@ -109,23 +112,23 @@ class NodeMixin(object):
         return (0, offset)
 
 
-class XMLWhitespace(NodeMixin, Whitespace):
-    pass
+class XMLWhitespace(Whitespace):
+    __slots__ = ()
 
 
-class XMLComment(NodeMixin, Comment):
-    @property
-    def val(self):
-        return self._val_literal
+class XMLComment(Comment):
+    __slots__ = ()
 
-    @property
-    def key(self):
-        return None
+    def __init__(self, ctx, span, val):
+        super(XMLComment, self).__init__(ctx, span)
+        self._val_cache = val
 
 
 # DocumentWrapper is sticky in serialization.
 # Always keep the one from the reference document.
 class DocumentWrapper(NodeMixin, StickyEntry):
+    __slots__ = ('_all_literal', '_val_literal', '_key_literal')
+
     def __init__(self, key, all):
         self._all_literal = all
         self._val_literal = all
@@ -137,30 +140,241 @@ class DocumentWrapper(NodeMixin, StickyEntry):
 
 
 class XMLJunk(Junk):
-    def __init__(self, all):
-        super(XMLJunk, self).__init__(None, (0, 0))
-        self._all_literal = all
+    __slots__ = ()
+
+
+# Patterns to find attributes in start tags, by name
+_attribute_patterns = {}
+
+
+class XMLNode(object):
+    '''A node of the document, with its span in the original text.
+
+    This has the parts of the minidom API that the AndroidChecker uses.
+    Only the root element, its children, and their children are created.
+    The latter don't have children of their own.
+    '''
+    __slots__ = (
+        'ctx', 'nodeType', 'nodeName', 'data', 'attributes', 'childNodes',
+        'span', 'inner_span',
+    )
+
+    def __init__(self, ctx, nodeType, nodeName=None, data=None,
+                 attributes=None, start=None):
+        self.ctx = ctx
+        self.nodeType = nodeType
+        self.nodeName = nodeName
+        self.data = data
+        self.attributes = attributes
+        self.childNodes = []
+        self.span = (start, None)
+        # the span of the content of elements
+        self.inner_span = None
 
     @property
-    def all(self):
-        return self._all_literal
+    def nodeValue(self):
+        return self.data
 
-    def position(self, offset=0):
-        return (0, offset)
+    def hasAttribute(self, name):
+        return self.attributes is not None and name in self.attributes
 
-    def value_position(self, offset=0):
-        return (0, offset)
+    def getAttribute(self, name):
+        if self.attributes is None:
+            return ''
+        return self.attributes.get(name, '')
+
+    def attribute_span(self, name):
+        '''The span of the value of the given attribute, or an empty
+        span at the start of the element.'''
+        try:
+            pattern = _attribute_patterns[name]
+        except KeyError:
+            pattern = _attribute_patterns[name] = re.compile(
+                r'\s{}\s*=\s*(["\'])(.*?)\1'.format(re.escape(name)),
+                re.S
+            )
+        m = pattern.search(
+            self.ctx.contents, self.span[0], self.inner_span[0]
+        )
+        if m is None:
+            return (self.span[0], self.span[0])
+        return m.span(2)
+
+    def toxml(self):
+        '''The original text of this node.'''
+        return self.ctx.contents[self.span[0]:self.span[1]]
+
+
+class TreeBuilder(object):
+    '''Create the XMLNodes of a document with expat.
+
+    Expat reports the byte offset of the start of each event. Where it
+    doesn't tell, we find the end of a node from the start of the next
+    event. Offsets are converted to offsets into the text as we go.
+    '''
+    # The depth of the elements whose children we create nodes for.
+    # That's the root element, and its children.
+    max_depth = 2
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.root = None
+        self.data = ctx.contents.encode('utf-8')
+        if len(self.data) == len(ctx.contents):
+            # ASCII, byte offsets are text offsets
+            self.offset = lambda index: index
+        else:
+            self.offset = self._decoded_offset
+        self._byte = self._char = 0
+        # open elements, None for those we don't create nodes for
+        self.stack = []
+        # element which hasn't seen an event after its start tag yet
+        self.started = None
+        self.text = None
+        self.cdata = None
+
+    def parse(self):
+        '''Parse the document and return the root element.
+
+        Raises expat.ExpatError for malformed documents.
+        '''
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = self.start_element
+        parser.EndElementHandler = self.end_element
+        parser.CharacterDataHandler = self.character_data
+        parser.StartCdataSectionHandler = self.start_cdata
+        parser.EndCdataSectionHandler = self.end_cdata
+        parser.CommentHandler = self.comment
+        parser.ProcessingInstructionHandler = self.processing_instruction
+        self.parser = parser
+        try:
+            parser.Parse(self.data, True)
+        finally:
+            # break the reference cycle through the handlers
+            self.parser = None
+        return self.root
+
+    def _decoded_offset(self, index):
+        if index < self._byte:
+            self._byte = self._char = 0
+        self._char += len(self.data[self._byte:index].decode('utf-8'))
+        self._byte = index
+        return self._char
+
+    def event(self):
+        '''Handle the start of an event, and return its offset.'''
+        index = self.parser.CurrentByteIndex
+        if self.text is not None:
+            self.text.span = (self.text.span[0], self.offset(index))
+            self.text = None
+        if self.started is not None:
+            self.started.inner_span = (self.offset(index), None)
+            self.started = None
+        return index
+
+    def add(self, node):
+        '''Add a node to the current element, if we keep its children.'''
+        if 0 < len(self.stack) <= self.max_depth:
+            self.stack[-1].childNodes.append(node)
+            return True
+        return False
+
+    def start_element(self, name, attributes):
+        index = self.event()
+        if len(self.stack) > self.max_depth:
+            self.stack.append(None)
+            return
+        node = XMLNode(
+            self.ctx, Node.ELEMENT_NODE, nodeName=name,
+            attributes=attributes, start=self.offset(index)
+        )
+        if self.root is None:
+            self.root = node
+        else:
+            self.add(node)
+        self.stack.append(node)
+        self.started = node
+
+    def end_element(self, name):
+        started = self.started
+        index = self.event()
+        node = self.stack.pop()
+        if node is None:
+            return
+        if started is node and self.data[index - 2:index] == b'/>':
+            # empty element tag, expat reports the end of it
+            end = index
+        else:
+            end = self.data.index(b'>', index) + 1
+        node.inner_span = (node.inner_span[0], self.offset(index))
+        node.span = (node.span[0], self.offset(end))
+
+    def character_data(self, data):
+        if self.cdata is not None:
+            self.cdata.data += data
+            return
+        if self.text is not None:
+            self.text.data += data
+            return
+        index = self.event()
+        node = XMLNode(
+            self.ctx, Node.TEXT_NODE, data=data, start=self.offset(index)
+        )
+        if self.add(node):
+            self.text = node
+
+    def start_cdata(self):
+        index = self.event()
+        node = XMLNode(
+            self.ctx, Node.CDATA_SECTION_NODE, data='',
+            start=self.offset(index)
+        )
+        if self.add(node):
+            self.cdata = node
+
+    def end_cdata(self):
+        index = self.event()
+        if self.cdata is not None:
+            self.cdata.span = (self.cdata.span[0], self.offset(index + 3))
+            self.cdata = None
+
+    def comment(self, data):
+        index = self.event()
+        node = XMLNode(
+            self.ctx, Node.COMMENT_NODE, data=data, start=self.offset(index)
+        )
+        if self.add(node):
+            end = index + len(data.encode('utf-8')) + 7
+            node.span = (node.span[0], self.offset(end))
+
+    def processing_instruction(self, target, data):
+        index = self.event()
+        node = XMLNode(
+            self.ctx, Node.PROCESSING_INSTRUCTION_NODE, nodeName=target,
+            data=data, start=self.offset(index)
+        )
+        if self.add(node):
+            end = self.data.index(b'?>', index) + 2
+            node.span = (node.span[0], self.offset(end))
+
+
+def escape(data):
+    '''Escape text content like minidom does.'''
+    return (
+        data.replace('&', '&amp;').replace('<', '&lt;')
+        .replace('"', '&quot;').replace('>', '&gt;')
+    )
 
 
 def textContent(node):
-    if node.childNodes.length == 0:
+    if len(node.childNodes) == 0:
         return ''
     for child in node.childNodes:
-        if child.nodeType == minidom.Node.CDATA_SECTION_NODE:
+        if child.nodeType == Node.CDATA_SECTION_NODE:
             return child.data
     if (
-            node.childNodes.length != 1 or
-            node.childNodes[0].nodeType != minidom.Node.TEXT_NODE
+            len(node.childNodes) != 1 or
+            node.childNodes[0].nodeType != Node.TEXT_NODE
     ):
         # Return something, we'll fail in checks on this
         return node.toxml()
@@ -189,13 +403,12 @@ class AndroidParser(Parser):
         ctx = self.ctx
         contents = ctx.contents
         try:
-            doc = minidom.parseString(contents.encode('utf-8'))
-        except Exception:
-            yield XMLJunk(contents)
+            docElement = TreeBuilder(ctx).parse()
+        except (expat.ExpatError, UnicodeError):
+            yield XMLJunk(ctx, (0, len(contents)))
             return
-        docElement = doc.documentElement
         if docElement.nodeName != 'resources':
-            yield XMLJunk(doc.toxml())
+            yield XMLJunk(ctx, docElement.span)
             return
         root_children = docElement.childNodes
         if not only_localizable:
@@ -225,7 +438,7 @@ class AndroidParser(Parser):
             else:
                 current_comment = None
             if node.nodeType in (Node.TEXT_NODE, Node.CDATA_SECTION_NODE):
-                white_space = XMLWhitespace(node.toxml(), node.nodeValue)
+                white_space = XMLWhitespace(ctx, node.span)
                 child_num += 1
                 if current_comment is None:
                     if not only_localizable:
@@ -265,17 +478,13 @@ class AndroidParser(Parser):
                 self.ctx,
                 current_comment,
                 white_space,
-                element,
-                element.toxml(),
-                element.getAttribute('name'),
-                textContent(element),
-                ''.join(c.toxml() for c in element.childNodes)
+                element
             )
         else:
-            return XMLJunk(element.toxml())
+            return XMLJunk(self.ctx, element.span)
 
     def handleComment(self, node, root_children, child_num):
-        all = node.toxml()
+        start, end = node.span
         val = normalize(node.nodeValue)
         while True:
             child_num += 1
@@ -298,8 +507,7 @@ class AndroidParser(Parser):
                     child_num -= 1
                 break
             if white:
-                all += white.toxml()
                 val += normalize(white.nodeValue)
-            all += node.toxml()
+            end = node.span[1]
             val += normalize(node.nodeValue)
-        return XMLComment(all, val), child_num
+        return XMLComment(self.ctx, (start, end), val), child_num
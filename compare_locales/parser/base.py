@@ -8,6 +8,7 @@ import re
 import bisect
 import codecs
 from collections import Counter
+import io
 from compare_locales.keyedtuple import KeyedTuple
 from compare_locales.paths import File
 
@@ -43,7 +44,14 @@ class Entry(object):
     <!ENTITY key "value">
 
     <--- definition ---->
+
+    Entries are created in large numbers, the classes in this hierarchy
+    define __slots__ to keep them small. Subclasses should, too.
     '''
+    __slots__ = (
+        'ctx', 'span', 'key_span', 'val_span', 'pre_comment', 'inner_white'
+    )
+
     def __init__(
         self, ctx, pre_comment, inner_white, span, key_span, val_span
     ):
@@ -123,14 +131,54 @@ class Entry(object):
         return self.key == other.key and self.val == other.val
 
 
+# Separates values when counting words in batches. The markup
+# expressions don't match across lines.
+WORD_COUNT_SEPARATOR = '\n\0\n'
+
+
+def count_words(entities):
+    '''Count the words of many entities.
+
+    Returns a list with the word count of each entity.
+    Entities using Entry.count_words are counted in one batch, replacing
+    the markup in all their values at once.
+    '''
+    counts = [None] * len(entities)
+    batch = []
+    values = []
+    entry_count_words = six.get_unbound_function(Entry.count_words)
+    for index, entity in enumerate(entities):
+        count_words = six.get_unbound_function(type(entity).count_words)
+        val = entity.val if count_words is entry_count_words else None
+        if val is None:
+            counts[index] = entity.count_words()
+            continue
+        batch.append(index)
+        values.append(val)
+    values = WORD_COUNT_SEPARATOR.join(values)
+    values = Entry.re_br.sub('\n', values)
+    values = Entry.re_sgml.sub('', values)
+    values = values.split('\0')
+    if len(values) != len(batch):
+        # separator in a value, count one by one
+        values = [entities[index].count_words() for index in batch]
+    else:
+        values = [len(value.split()) for value in values]
+    for index, count in zip(batch, values):
+        counts[index] = count
+    return counts
+
+
 class StickyEntry(Entry):
     """Subclass of Entry to use in for syntax fragments
     which should always be overwritten in the serializer.
     """
-    pass
+    __slots__ = ()
 
 
 class Entity(Entry):
+    __slots__ = ()
+
     @property
     def localized(self):
         '''Is this entity localized.
@@ -164,6 +212,8 @@ class LiteralEntity(Entity):
 
     It's storing string literals for key, raw_val and all instead of spans.
     """
+    __slots__ = ('_key', '_raw_val', '_all')
+
     def __init__(self, key, val, all):
         super(LiteralEntity, self).__init__(None, None, None, None, None, None)
         self._key = key
@@ -186,11 +236,15 @@ class LiteralEntity(Entity):
 class PlaceholderEntity(LiteralEntity):
     """Subclass of Entity to be removed in merges.
     """
+    __slots__ = ()
+
     def __init__(self, key):
         super(PlaceholderEntity, self).__init__(key, "", "\nplaceholder\n")
 
 
 class Comment(Entry):
+    __slots__ = ('_val_cache',)
+
     def __init__(self, ctx, span):
         self.ctx = ctx
         self.span = span
@@ -216,6 +270,7 @@ class OffsetComment(Comment):
     chars to strip from comments.
     Offset defaults to 1
     '''
+    __slots__ = ()
     comment_offset = 1
 
     @property
@@ -233,6 +288,7 @@ class Junk(object):
     This way, we can signal bad content as stuff we don't understand.
     And the either fix that, or report real bugs in localizations.
     '''
+    __slots__ = ('ctx', 'span', 'key')
     junkid = 0
 
     def __init__(self, ctx, span):
@@ -280,6 +336,8 @@ class Whitespace(Entry):
     '''Entity-like object representing an empty file with whitespace,
     if allowed
     '''
+    __slots__ = ()
+
     def __init__(self, ctx, span):
         self.ctx = ctx
         self.span = self.key_span = self.val_span = span
@@ -294,15 +352,57 @@ class BadEntity(ValueError):
     pass
 
 
+class Tokenizer(object):
+    '''Match the next fragment of a file with a single expression.
+
+    `tokens` are pairs of the kind of a fragment and its expression,
+    in order of precedence. The expressions are joined into one
+    alternation with a named group per kind, so `lastgroup` of a match
+    is the kind of fragment found. The flags of the expressions are
+    combined.
+    Only the `entity` expression keeps its named groups, fragments of
+    other kinds need to be matched again to get to theirs.
+    '''
+    reNamedGroup = re.compile(r'\(\?P<\w+>')
+
+    def __init__(self, tokens):
+        patterns = []
+        flags = 0
+        for kind, exp in tokens:
+            pattern = exp.pattern
+            if kind != 'entity':
+                pattern = self.reNamedGroup.sub('(?:', pattern)
+            patterns.append('(?P<{}>{})'.format(kind, pattern))
+            flags |= exp.flags
+        self.expression = re.compile('|'.join(patterns), flags)
+        self.match = self.expression.match
+
+
 class Parser(object):
     capabilities = CAN_SKIP | CAN_MERGE
     reWhitespace = re.compile('[ \t\r\n]+', re.M)
     Comment = Comment
     # NotImplementedError would be great, but also tedious
     reKey = reComment = None
+    # Comments with "License" starting before this offset are standalone
+    license_header_end = 2
+    _tokenizer = None
+    # Parsers which can read files in chunks, see readFile.
+    # That needs a format in which fragments don't span a blank line
+    # followed by the start of a fragment.
+    can_stream = False
+    stream_block_size = 1 << 16
+    _stream = None
 
     class Context(object):
         "Fixture for content and line numbers"
+        # When streaming, contents are a chunk of the file, starting at
+        # file_offset, after line_offset lines.
+        file_offset = 0
+        line_offset = 0
+        # match of the fragment after a standalone comment, see getNext
+        next_token = None
+
         def __init__(self, contents):
             self.contents = contents
             # cache split lines
@@ -319,17 +419,29 @@ class Parser(object):
             line_start = self._lines[line_offset - 1] if line_offset else 0
             col_offset = position - line_start
 
-            return line_offset + 1, col_offset + 1
+            return self.line_offset + line_offset + 1, col_offset + 1
 
     def __init__(self):
         if not hasattr(self, 'encoding'):
             self.encoding = 'utf-8'
         self.ctx = None
 
-    def readFile(self, file):
-        '''Read contents from disk, with universal_newlines'''
+    def readFile(self, file, stream=False):
+        '''Read contents from disk, with universal_newlines
+
+        If `stream` is True and the parser can_stream, the file isn't
+        read here. Instead, walk() reads it in blocks, and parses it in
+        chunks. The entries refer to the context of their chunk, which
+        is also available as `ctx` while walking. Memory use then only
+        depends on the size of the chunks, unless the caller holds on
+        to the entries.
+        '''
         if isinstance(file, File):
             file = file.fullpath
+        if stream and self.can_stream:
+            self.ctx = None
+            self._stream = file
+            return
         # python 2 has binary input with universal newlines,
         # python 3 doesn't. Let's split code paths
         if six.PY2:
@@ -352,6 +464,7 @@ class Parser(object):
         self.readUnicode(contents)
 
     def readUnicode(self, contents):
+        self._stream = None
         self.ctx = self.Context(contents)
 
     def parse(self):
@@ -361,10 +474,19 @@ class Parser(object):
         return self.walk(only_localizable=True)
 
     def walk(self, only_localizable=False):
+        if self._stream is not None:
+            for ctx in self.readChunks(self._stream):
+                self.ctx = ctx
+                for entity in self.walkContext(ctx, only_localizable):
+                    yield entity
+            return
         if not self.ctx:
             # loading file failed, or we just didn't load anything
             return
-        ctx = self.ctx
+        for entity in self.walkContext(self.ctx, only_localizable):
+            yield entity
+
+    def walkContext(self, ctx, only_localizable=False):
         contents = ctx.contents
 
         next_offset = 0
@@ -378,31 +500,129 @@ class Parser(object):
 
             next_offset = entity.span[1]
 
+    def readChunks(self, path):
+        '''Create parsing contexts for the chunks of a file.
+
+        Chunks end in a blank line which is followed by the start of
+        a fragment, so each of them can be parsed on its own.
+        '''
+        file_offset = line_offset = 0
+        pending = ''
+        with io.open(
+            path, 'r',
+            encoding=self.encoding, errors='replace',
+            newline=None
+        ) as f:
+            while True:
+                block = f.read(self.stream_block_size)
+                contents = pending + block
+                if block:
+                    end = self.chunkEnd(contents)
+                    if end is None:
+                        pending = contents
+                        continue
+                else:
+                    end = len(contents)
+                if end:
+                    ctx = self.Context(contents[:end])
+                    ctx.file_offset = file_offset
+                    ctx.line_offset = line_offset
+                    yield ctx
+                    file_offset += end
+                    line_offset += contents.count('\n', 0, end)
+                pending = contents[end:]
+                if not block:
+                    return
+
+    def chunkEnd(self, contents):
+        '''Find the end of the last complete chunk in contents.
+
+        Returns None if there's none.
+        '''
+        blank = contents.rfind('\n\n')
+        while blank >= 0:
+            end = blank + 2
+            if self._isChunkEnd(contents, blank, end):
+                return end
+            blank = contents.rfind('\n\n', 0, blank + 1)
+        return None
+
+    def _isChunkEnd(self, contents, blank, end):
+        # The next fragment needs to start right after the blank line,
+        # otherwise its leading whitespace would be parsed on its own.
+        if end >= len(contents) or contents[end] in ' \t\r\n':
+            return False
+        if not any(
+            exp.match(contents, end) for exp in self.fragmentStarts()
+        ):
+            return False
+        # A comment before the blank line mustn't be glued to the
+        # next entity, as getNext does if there's just one newline
+        # between them. The comment doesn't need to start the line,
+        # if it follows Junk.
+        line_start = contents.rfind('\n', 0, blank) + 1
+        m = self.reComment.search(contents, line_start, end)
+        if m and m.start() <= blank and m.end() >= blank:
+            return contents.count('\n', m.end(), end) > 1
+        return True
+
+    def fragmentStarts(self):
+        '''Expressions matching the start of a fragment.
+
+        These are the expressions ending Junk, too.
+        '''
+        return (self.reKey, self.reComment)
+
+    def tokens(self):
+        '''Kinds of fragments and their expressions for the tokenizer.
+
+        The kinds are `comment`, `white`, and `entity`, in the order
+        in which getNext tries them.
+        '''
+        return (
+            ('comment', self.reComment),
+            ('white', self.reWhitespace),
+            ('entity', self.reKey),
+        )
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = Tokenizer(self.tokens())
+        return self._tokenizer
+
     def getNext(self, ctx, offset):
         '''Parse the next fragment.
 
         Parse comments first, then white-space.
         If an entity follows, create that entity with such pre_comment and
         inner white-space. If not, emit comment or white-space as standlone.
-        It's OK that this might parse whitespace more than once.
         Comments are associated with entities if they're not separated by
         blank lines. Multiple consecutive comments are joined.
         '''
         junk_offset = offset
-        m = self.reComment.match(ctx.contents, offset)
-        if m:
+        contents = ctx.contents
+        match = self.tokenizer.match
+        m = ctx.next_token
+        if m is None or m.start() != offset:
+            m = match(contents, offset)
+        kind = m and m.lastgroup
+        current_comment = white_space = None
+        if kind == 'comment':
             current_comment = self.Comment(ctx, m.span())
-            if offset < 2 and 'License' in current_comment.val:
+            if (
+                ctx.file_offset + offset < self.license_header_end
+                and 'License' in current_comment.val
+            ):
                 # Heuristic. A early comment with "License" is probably
                 # a license header, and should be standalone.
                 # Not glueing ourselves to offset == 0 as we might have
                 # skipped a BOM.
                 return current_comment
             offset = m.end()
-        else:
-            current_comment = None
-        m = self.reWhitespace.match(ctx.contents, offset)
-        if m:
+            m = match(contents, offset)
+            kind = m and m.lastgroup
+        if kind == 'white':
             white_space = Whitespace(ctx, m.span())
             offset = m.end()
             if (
@@ -410,14 +630,14 @@ class Parser(object):
                 and white_space.raw_val.count('\n') > 1
             ):
                 # standalone comment
-                # return the comment, and reparse the whitespace next time
+                # return the comment, and keep the whitespace for next time
+                ctx.next_token = m
                 return current_comment
             if current_comment is None:
                 return white_space
-        else:
-            white_space = None
-        m = self.reKey.match(ctx.contents, offset)
-        if m:
+            m = match(contents, offset)
+            kind = m and m.lastgroup
+        if kind == 'entity':
             try:
                 return self.createEntity(ctx, m, current_comment, white_space)
             except BadEntity:
@@ -430,9 +650,11 @@ class Parser(object):
         return self.getJunk(ctx, junk_offset, self.reKey, self.reComment)
 
     def getJunk(self, ctx, offset, *expressions):
+        # Junk is at least one character. If an expression matches at
+        # offset, the entity there was bad, skip to the next fragment.
         junkend = None
         for exp in expressions:
-            m = exp.search(ctx.contents, offset)
+            m = exp.search(ctx.contents, offset + 1)
             if m:
                 junkend = min(junkend, m.start()) if junkend else m.start()
         return Junk(ctx, (offset, junkend or len(ctx.contents)))
@@ -16,6 +16,8 @@ from .base import (
 class DefinesInstruction(Entry):
     '''Entity-like object representing processing instructions in inc files
     '''
+    __slots__ = ()
+
     def __init__(self, ctx, span, val_span):
         self.ctx = ctx
         self.span = span
@@ -33,6 +35,7 @@ class DefinesParser(Parser):
     EMPTY_LINES = 1 << 0
 
     class Comment(OffsetComment):
+        __slots__ = ()
         comment_offset = 2
 
     class Context(Parser.Context):
@@ -49,19 +52,28 @@ class DefinesParser(Parser):
         self.rePI = re.compile(r'#(?P<val>\w+[ \t]+[^\n]+)', re.M)
         Parser.__init__(self)
 
+    def tokens(self):
+        return super(DefinesParser, self).tokens() + (
+            ('instruction', self.rePI),
+        )
+
     def getNext(self, ctx, offset):
         junk_offset = offset
         contents = ctx.contents
 
-        m = self.reComment.match(ctx.contents, offset)
-        if m:
+        match = self.tokenizer.match
+        m = ctx.next_token
+        if m is None or m.start() != offset:
+            m = match(contents, offset)
+        kind = m and m.lastgroup
+        current_comment = white_space = None
+        if kind == 'comment':
             current_comment = self.Comment(ctx, m.span())
             offset = m.end()
-        else:
-            current_comment = None
+            m = match(contents, offset)
+            kind = m and m.lastgroup
 
-        m = self.reWhitespace.match(contents, offset)
-        if m:
+        if kind == 'white':
             # blank lines outside of filter_empty_lines or
             # leading whitespace are bad
             if (
@@ -78,15 +90,15 @@ class DefinesParser(Parser):
                 and white_space.raw_val.count('\n') > 1
             ):
                 # standalone comment
-                # return the comment, and reparse the whitespace next time
+                # return the comment, and keep the whitespace for next time
+                ctx.next_token = m
                 return current_comment
             if current_comment is None:
                 return white_space
-        else:
-            white_space = None
+            m = match(contents, offset)
+            kind = m and m.lastgroup
 
-        m = self.reKey.match(contents, offset)
-        if m:
+        if kind == 'entity':
             return self.createEntity(ctx, m, current_comment, white_space)
         # defines instructions don't have comments
         # Any pending commment is standalone
@@ -94,8 +106,9 @@ class DefinesParser(Parser):
             return current_comment
         if white_space:
             return white_space
-        m = self.rePI.match(contents, offset)
-        if m:
+        if kind == 'instruction':
+            # match again for the named groups
+            m = self.rePI.match(contents, offset)
             instr = DefinesInstruction(ctx, m.span(), m.span('val'))
             if instr.val == 'filter emptyLines':
                 ctx.filter_empty_lines = True
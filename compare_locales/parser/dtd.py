@@ -20,6 +20,8 @@ from .base import (
 
 
 class DTDEntityMixin(object):
+    __slots__ = ()
+
     @property
     def val(self):
         '''Unescape HTML entities into corresponding Unicode characters.
@@ -51,7 +53,7 @@ class DTDEntityMixin(object):
 
 
 class DTDEntity(DTDEntityMixin, Entity):
-    pass
+    __slots__ = ()
 
 
 class DTDParser(Parser):
@@ -86,6 +88,8 @@ class DTDParser(Parser):
                       '(?:[ \t]*(?:' + XmlComment + u'[ \t\r\n]*)*\n?)?')
 
     class Comment(Comment):
+        __slots__ = ()
+
         @property
         def val(self):
             if self._val_cache is None:
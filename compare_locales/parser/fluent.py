@@ -38,6 +38,7 @@ class WordCounter(ftl.Visitor):
 
 
 class FluentAttribute(Entry):
+    __slots__ = ('attr',)
     ignored_fields = ['span']
 
     def __init__(self, entity, attr_node):
@@ -54,6 +55,7 @@ class FluentAttribute(Entry):
 
 
 class FluentEntity(Entity):
+    __slots__ = ('entry', '_word_count')
     # Fields ignored when comparing two entities.
     ignored_fields = ['comment', 'span']
 
@@ -84,6 +86,7 @@ class FluentEntity(Entity):
         # don't need it because message comments are part of the entry AST and
         # are not separate Comment instances.
         self.pre_comment = None
+        self._word_count = None
 
     @property
     def root_node(self):
@@ -93,8 +96,6 @@ class FluentEntity(Entity):
         '''
         return self.entry
 
-    _word_count = None
-
     def count_words(self):
         if self._word_count is None:
             counter = WordCounter()
@@ -140,10 +141,11 @@ class FluentEntity(Entity):
 
 
 class FluentMessage(FluentEntity):
-    pass
+    __slots__ = ()
 
 
 class FluentTerm(FluentEntity):
+    __slots__ = ()
     # Fields ignored when comparing two terms.
     ignored_fields = ['attributes', 'comment', 'span']
 
@@ -158,6 +160,8 @@ class FluentTerm(FluentEntity):
 
 
 class FluentComment(Comment):
+    __slots__ = ()
+
     def __init__(self, ctx, span, entry):
         super(FluentComment, self).__init__(ctx, span)
         self._val_cache = entry.content
@@ -15,6 +15,8 @@ from .base import (
 class IniSection(Entry):
     '''Entity-like object representing sections in ini files
     '''
+    __slots__ = ()
+
     def __init__(self, ctx, span, val_span):
         self.ctx = ctx
         self.span = span
@@ -36,6 +38,7 @@ class IniParser(Parser):
     '''
 
     Comment = OffsetComment
+    can_stream = True
 
     def __init__(self):
         self.reComment = re.compile('(?:^[;#][^\n]*\n)*(?:^[;#][^\n]*)', re.M)
@@ -56,3 +59,6 @@ class IniParser(Parser):
         # Add self.reSection to the end-of-junk expressions
         expressions = expressions + (self.reSection,)
         return super(IniParser, self).getJunk(ctx, offset, *expressions)
+
+    def fragmentStarts(self):
+        return super(IniParser, self).fragmentStarts() + (self.reSection,)
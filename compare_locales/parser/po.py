@@ -21,6 +21,7 @@ from .base import (
 
 
 class PoEntityMixin(object):
+    __slots__ = ()
 
     @property
     def val(self):
@@ -44,7 +45,7 @@ class PoEntityMixin(object):
 
 
 class PoEntity(PoEntityMixin, Entity):
-    pass
+    __slots__ = ('stringlist_key', 'stringlist_val')
 
 
 # Unescape and concat a string list
@@ -65,6 +66,7 @@ def eval_stringlist(lines):
 class PoParser(Parser):
     # gettext l10n fallback at runtime, don't merge en-US strings
     capabilities = CAN_SKIP
+    can_stream = True
 
     reKey = re.compile('msgctxt|msgid')
     reValue = re.compile('(?P<white>[ \t\r\n]*)(?P<cmd>msgstr)')
@@ -75,10 +77,40 @@ class PoParser(Parser):
     # escaped quotes etc, not quote, newline, backslash
     # `"`
     reListItem = re.compile(r'[ \t\r\n]*"((?:\\[\\trn"]|[^"\n\\])*)"')
+    # quotes starting or ending a string
+    reQuote = re.compile(r'(?<!\\)"')
 
     def __init__(self):
         super(PoParser, self).__init__()
 
+    def _isChunkEnd(self, contents, blank, end):
+        if not super(PoParser, self)._isChunkEnd(contents, blank, end):
+            return False
+        # Entries can have blank lines between their parts, don't cut
+        # before the msgstr of the last entry.
+        last = None
+        for keyword in ('msgctxt', 'msgid', 'msgstr'):
+            pos = self._rfindKeyword(contents, keyword, blank)
+            if pos >= 0 and (last is None or pos > last[0]):
+                last = (pos, keyword)
+        return last is None or last[1] == 'msgstr'
+
+    def _rfindKeyword(self, contents, keyword, end):
+        '''Find the last keyword before end, outside of strings
+        and comments.
+        '''
+        pos = contents.rfind(keyword, 0, end)
+        while pos >= 0:
+            line_start = contents.rfind('\n', 0, pos) + 1
+            quotes = self.reQuote.findall(contents, line_start, pos)
+            if (
+                len(quotes) % 2 == 0
+                and not contents.startswith('#', line_start)
+            ):
+                return pos
+            pos = contents.rfind(keyword, 0, pos)
+        return pos
+
     def createEntity(self, ctx, m, current_comment, white_space):
         start = cursor = m.start()
         id_start = cursor
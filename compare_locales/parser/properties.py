@@ -7,19 +7,28 @@ from __future__ import unicode_literals
 import re
 
 from .base import (
-    Entity, OffsetComment, Whitespace,
+    Entity, OffsetComment,
     Parser
 )
 from six import unichr
 
 
 class PropertiesEntityMixin(object):
+    __slots__ = ()
     escape = re.compile(r'\\((?P<uni>u[0-9a-fA-F]{1,4})|'
                         '(?P<nl>\n[ \t]*)|(?P<single>.))', re.M)
     known_escapes = {'n': '\n', 'r': '\r', 't': '\t', '\\': '\\'}
 
     @property
     def val(self):
+        if self._val_cache is not None:
+            return self._val_cache
+        raw_val = self.raw_val
+        if '\\' not in raw_val:
+            # nothing to unescape
+            self._val_cache = raw_val
+            return raw_val
+
         def unescape(m):
             found = m.groupdict()
             if found['uni']:
@@ -28,89 +37,50 @@ class PropertiesEntityMixin(object):
                 return ''
             return self.known_escapes.get(found['single'], found['single'])
 
-        return self.escape.sub(unescape, self.raw_val)
+        self._val_cache = self.escape.sub(unescape, raw_val)
+        return self._val_cache
 
 
 class PropertiesEntity(PropertiesEntityMixin, Entity):
-    pass
+    # the unescaped value, computed on first access
+    __slots__ = ('_val_cache',)
+
+    def __init__(
+        self, ctx, pre_comment, inner_white, span, key_span, val_span
+    ):
+        super(PropertiesEntity, self).__init__(
+            ctx, pre_comment, inner_white, span, key_span, val_span
+        )
+        self._val_cache = None
 
 
 class PropertiesParser(Parser):
 
     Comment = OffsetComment
+    can_stream = True
+    license_header_end = 1
 
     def __init__(self):
         self.reKey = re.compile(
             '(?P<key>[^#! \t\r\n][^=:\n]*?)[ \t]*[:=][ \t]*', re.M)
         self.reComment = re.compile('(?:[#!][^\n]*\n)*(?:[#!][^\n]*)', re.M)
-        self._escapedEnd = re.compile(r'\\+$')
-        self._trailingWS = re.compile(r'[ \t\r\n]*(?:\n|\Z)', re.M)
+        # A value ends at the first newline which isn't escaped.
+        # Escapes are matched in pairs, so an even number of backslashes
+        # at the end of a line doesn't escape the newline.
+        self._value = re.compile(r'(?:[^\\\n]+|\\.?)*', re.S)
         Parser.__init__(self)
 
-    def getNext(self, ctx, offset):
-        junk_offset = offset
-        # overwritten to parse values line by line
+    def createEntity(self, ctx, m, current_comment, white_space):
+        # overwritten to parse values over escaped newlines
         contents = ctx.contents
-
-        m = self.reComment.match(contents, offset)
-        if m:
-            current_comment = self.Comment(ctx, m.span())
-            if offset == 0 and 'License' in current_comment.val:
-                # Heuristic. A early comment with "License" is probably
-                # a license header, and should be standalone.
-                return current_comment
-            offset = m.end()
-        else:
-            current_comment = None
-
-        m = self.reWhitespace.match(contents, offset)
-        if m:
-            white_space = Whitespace(ctx, m.span())
-            offset = m.end()
-            if (
-                current_comment is not None
-                and white_space.raw_val.count('\n') > 1
-            ):
-                # standalone comment
-                return current_comment
-            if current_comment is None:
-                return white_space
-        else:
-            white_space = None
-
-        m = self.reKey.match(contents, offset)
-        if m:
-            startline = offset = m.end()
-            while True:
-                endval = nextline = contents.find('\n', offset)
-                if nextline == -1:
-                    endval = offset = len(contents)
-                    break
-                # is newline escaped?
-                _e = self._escapedEnd.search(contents, offset, nextline)
-                offset = nextline + 1
-                if _e is None:
-                    break
-                # backslashes at end of line, if 2*n, not escaped
-                if len(_e.group()) % 2 == 0:
-                    break
-                startline = offset
-
-            # strip trailing whitespace
-            ws = self._trailingWS.search(contents, startline)
-            if ws:
-                endval = ws.start()
-
-            entity = PropertiesEntity(
-                ctx, current_comment, white_space,
-                (m.start(), endval),   # full span
-                m.span('key'),
-                (m.end(), endval))   # value span
-            return entity
-
-        if current_comment is not None:
-            return current_comment
-        if white_space is not None:
-            return white_space
-
-        return self.getJunk(ctx, junk_offset, self.reKey, self.reComment)
+        start = m.end()
+        endval = self._value.match(contents, start).end()
+        # strip trailing whitespace, but not the escaped newline
+        # of a continuation line
+        while endval > start and contents[endval - 1] in ' \t\r':
+            endval -= 1
+        return PropertiesEntity(
+            ctx, current_comment, white_space,
+            (m.start(), endval),   # full span
+            m.span('key'),
+            (start, endval))   # value span
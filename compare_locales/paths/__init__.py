@@ -4,7 +4,7 @@
 
 from __future__ import absolute_import
 from compare_locales import mozpath
-from .files import ProjectFiles, REFERENCE_LOCALE
+from .files import FileIndex, ProjectFiles, REFERENCE_LOCALE
 from .ini import (
     L10nConfigParser, SourceTreeConfigParser,
     EnumerateApp, EnumerateSourceTreeApp,
@@ -19,7 +19,7 @@ __all__ = [
     'ProjectConfig',
     'L10nConfigParser', 'SourceTreeConfigParser',
     'EnumerateApp', 'EnumerateSourceTreeApp',
-    'ProjectFiles', 'REFERENCE_LOCALE',
+    'FileIndex', 'ProjectFiles', 'REFERENCE_LOCALE',
     'TOMLParser', 'ConfigNotFound',
 ]
 
@@ -4,8 +4,12 @@
 
 from __future__ import absolute_import
 import errno
+import hashlib
 import logging
+import os
+import pickle
 from compare_locales import mozpath
+from compare_locales import version
 from .project import ProjectConfig
 from .matcher import expand
 import pytoml as toml
@@ -27,13 +31,115 @@ class ParseContext(object):
         self.ignore_missing_includes = ignore_missing_includes
         self.data = None
         self.pc = ProjectConfig(path)
+        # The configs parsed for the top-level config, by path.
+        # Shared with the contexts of the includes and excludes.
+        self.configs = {}
+
+
+class ConfigCache(object):
+    '''On-disk cache of parsed project configurations.
+
+    The cached ProjectConfig is stored together with the paths and
+    hashes of all configuration files that were read to create it.
+    It's only used as long as none of those files changed.
+    The key is made of the path of the top-level config, the environment,
+    and the version of compare-locales.
+    '''
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def key(self, path, env, ignore_missing_includes):
+        key = hashlib.sha1()
+        for part in [
+            version,
+            mozpath.abspath(path),
+            str(ignore_missing_includes),
+        ] + [
+            '{}={}'.format(name, value)
+            for name, value in sorted(env.items())
+        ]:
+            key.update(part.encode('utf-8') + b'\0')
+        return key.hexdigest()
+
+    def get(self, key):
+        '''Get the cached ProjectConfig for the given key, or None.'''
+        try:
+            with open(self._path(key), 'rb') as f:
+                files, config = pickle.load(f)
+        except Exception:
+            # missing, or created by an incompatible version
+            return None
+        for path, digest in files:
+            if _digest(path) != digest:
+                return None
+        return config
+
+    def set(self, key, paths, config):
+        '''Store the ProjectConfig read from the given files.'''
+        files = [(path, _digest(path)) for path in paths]
+        try:
+            os.makedirs(self.cache_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        path = self._path(key)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((files, config), f, pickle.HIGHEST_PROTOCOL)
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+
+    def clear(self):
+        '''Remove all entries.'''
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith('.pickle'):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.pickle')
+
+
+def _digest(path):
+    '''Hash of the file contents, None if the file doesn't exist.'''
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except EnvironmentError:
+        return None
 
 
 class TOMLParser(object):
+    '''Parser for l10n.toml project configurations.
+
+    Configs which are included or excluded more than once are parsed
+    only once per call to `parse`.
+    If a `cache_dir` is given, the parsed configs are cached on disk,
+    see ConfigCache.
+    '''
+    cache = None
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is not None:
+            self.cache = ConfigCache(cache_dir)
+
     def parse(self, path, env=None, ignore_missing_includes=False):
         ctx = self.context(
             path, env=env, ignore_missing_includes=ignore_missing_includes
         )
+        if self.cache is None:
+            return self._parse(ctx)
+        key = self.cache.key(path, ctx.env, ignore_missing_includes)
+        config = self.cache.get(key)
+        if config is None:
+            config = self._parse(ctx)
+            self.cache.set(key, sorted(ctx.configs), config)
+        return config
+
+    def _parse(self, ctx):
+        ctx.configs[ctx.path] = None
         self.load(ctx)
         self.processBasePath(ctx)
         self.processEnv(ctx)
@@ -42,7 +148,8 @@ class TOMLParser(object):
         self.processIncludes(ctx)
         self.processExcludes(ctx)
         self.processLocales(ctx)
-        return self.asConfig(ctx)
+        config = ctx.configs[ctx.path] = self.asConfig(ctx)
+        return config
 
     def context(self, path, env=None, ignore_missing_includes=False):
         return ParseContext(
@@ -122,11 +229,17 @@ class TOMLParser(object):
                     ctx.pc.environ
                 )
             )
+            child = ctx.configs.get(p)
+            if child is not None:
+                yield child
+                continue
+            child_ctx = self.context(
+                p, env=ctx.env,
+                ignore_missing_includes=ctx.ignore_missing_includes
+            )
+            child_ctx.configs = ctx.configs
             try:
-                child = self.parse(
-                    p, env=ctx.env,
-                    ignore_missing_includes=ctx.ignore_missing_includes
-                )
+                child = self._parse(child_ctx)
             except ConfigNotFound as e:
                 if not ctx.ignore_missing_includes:
                     raise
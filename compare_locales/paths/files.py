@@ -5,6 +5,12 @@
 from __future__ import absolute_import
 import os
 from compare_locales import mozpath
+from .matcher import MatcherIndex
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
 
 
 REFERENCE_LOCALE = 'en-x-moz-reference'
@@ -20,18 +26,97 @@ class ConfigList(list):
             self.append(config)
 
 
+class FileIndex(object):
+    '''Snapshot of directory listings.
+
+    Each directory is listed once, when it's first needed. Share one
+    FileIndex between the ProjectFiles of all locales, so that the
+    reference tree is only scanned once. Changes to the file system
+    after a directory got listed aren't reflected.
+    '''
+    def __init__(self):
+        self._listings = {}
+
+    def listing(self, path):
+        '''Return a tuple of the directories, the other entries, and
+        the symlinked directories in path. The directories and other
+        entries are lists in listing order, followed by frozensets of
+        them for lookups.
+
+        If path isn't a directory, return None.
+        '''
+        try:
+            return self._listings[path]
+        except KeyError:
+            pass
+        dirs, files, links = [], [], set()
+        try:
+            if scandir is None:
+                for name in os.listdir(path):
+                    child = os.path.join(path, name)
+                    if os.path.isdir(child):
+                        dirs.append(name)
+                        if os.path.islink(child):
+                            links.add(name)
+                    else:
+                        files.append(name)
+            else:
+                for entry in scandir(path):
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                    else:
+                        files.append(entry.name)
+            listing = (
+                dirs, files, links, frozenset(dirs), frozenset(files)
+            )
+        except OSError:
+            listing = None
+        self._listings[path] = listing
+        return listing
+
+    def walk(self, base):
+        '''Like os.walk, without following symlinks.'''
+        listing = self.listing(base)
+        if listing is None:
+            return
+        dirs, files, links, _, _ = listing
+        yield base, dirs, files
+        for d in dirs:
+            if d in links:
+                continue
+            for tpl in self.walk(mozpath.join(base, d)):
+                yield tpl
+
+    def isfile(self, path):
+        listing = self.listing(mozpath.dirname(path) or '.')
+        return listing is not None and mozpath.basename(path) in listing[4]
+
+    def exists(self, path):
+        listing = self.listing(mozpath.dirname(path) or '.')
+        if listing is None:
+            return False
+        name = mozpath.basename(path)
+        return name in listing[4] or name in listing[3]
+
+
 class ProjectFiles(object):
     '''Iterable object to get all files and tests for a locale and a
     list of ProjectConfigs.
 
     If the given locale is None, iterate over reference files as
     both reference and locale for a reference self-test.
+
+    If a FileIndex is given, use that instead of the file system.
     '''
-    def __init__(self, locale, projects, mergebase=None):
+    def __init__(self, locale, projects, mergebase=None, file_index=None):
         self.locale = locale
         self.matchers = []
         self.exclude = None
         self.mergebase = mergebase
+        self.file_index = file_index
+        self._match_index = self._l10n_index = None
         configs = ConfigList()
         excludes = ConfigList()
         for project in projects:
@@ -186,10 +271,16 @@ class ProjectFiles(object):
                     yield p
 
     def _isfile(self, path):
+        if self.file_index is not None:
+            return self.file_index.isfile(path)
         return os.path.isfile(path)
 
     def _walk(self, base):
-        for d, dirs, files in os.walk(base):
+        if self.file_index is not None:
+            walk = self.file_index.walk(base)
+        else:
+            walk = os.walk(base)
+        for d, dirs, files in walk:
             yield d, dirs, files
 
     def match(self, path):
@@ -203,21 +294,47 @@ class ProjectFiles(object):
             self.exclude and self.exclude.match(path) is not None
         ):
             return
-        for matchers in self.matchers:
-            matcher = matchers['l10n']
-            if self.locale is not None and matcher.match(path) is not None:
-                ref = merge = None
+        if self._match_index is None:
+            # Try the l10n and reference matchers of each entry
+            # in the order of self.matchers.
+            entries = []
+            for matchers in self.matchers:
+                if self.locale is not None:
+                    entries.append((matchers, 'l10n'))
                 if 'reference' in matchers:
-                    ref = matcher.sub(matchers['reference'], path)
-                if 'merge' in matchers:
-                    merge = matcher.sub(matchers['merge'], path)
-                return path, ref, merge, matchers.get('test')
-            if 'reference' not in matchers:
-                continue
-            matcher = matchers['reference']
-            if matcher.match(path) is not None:
-                merge = None
-                l10n = matcher.sub(matchers['l10n'], path)
-                if 'merge' in matchers:
-                    merge = matcher.sub(matchers['merge'], path)
-                return l10n, path, merge, matchers.get('test')
+                    entries.append((matchers, 'reference'))
+            self._match_index = (
+                entries,
+                MatcherIndex(matchers[kind] for matchers, kind in entries)
+            )
+        entries, index = self._match_index
+        found = index.match(path)
+        if found is None:
+            return
+        matchers, kind = entries[found[0]]
+        matcher = matchers[kind]
+        if kind == 'l10n':
+            ref = merge = None
+            if 'reference' in matchers:
+                ref = matcher.sub(matchers['reference'], path)
+            if 'merge' in matchers:
+                merge = matcher.sub(matchers['merge'], path)
+            return path, ref, merge, matchers.get('test')
+        merge = None
+        l10n = matcher.sub(matchers['l10n'], path)
+        if 'merge' in matchers:
+            merge = matcher.sub(matchers['merge'], path)
+        return l10n, path, merge, matchers.get('test')
+
+    def l10n_matchers(self, path):
+        '''Return the first entry in self.matchers with an l10n
+        matcher matching the given path, or None.
+        '''
+        if self._l10n_index is None:
+            self._l10n_index = MatcherIndex(
+                matchers['l10n'] for matchers in self.matchers
+            )
+        found = self._l10n_index.match(path)
+        if found is None:
+            return None
+        return self.matchers[found[0]]
@@ -3,6 +3,7 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import absolute_import
+from collections import defaultdict
 import os
 import re
 import itertools
@@ -23,6 +24,57 @@ ANDROID_STANDARD_MAP = {
 }
 
 
+class RegexCache(object):
+    '''Compiled regular expressions of Matchers, shared by the process.
+
+    Matchers are copied for each locale with with_env, and the copies
+    for the same locale share their regular expression.
+    The key is the pattern, the resolved environment and the encoding.
+    '''
+    # drop everything if we get too many entries, like the re module does
+    MAX_SIZE = 10000
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.regexes = {}
+        self.hits = self.misses = 0
+
+    def get(self, matcher):
+        key = (
+            matcher.pattern.cache_key(),
+            frozenset(
+                (name, value.cache_key())
+                for name, value in matcher.env.items()
+            ),
+            matcher.encoding
+        )
+        regex = self.regexes.get(key)
+        if regex is not None:
+            self.hits += 1
+            return regex
+        self.misses += 1
+        pattern = matcher.pattern.regex_pattern(matcher.env) + '$'
+        if matcher.encoding is not None:
+            pattern = pattern.encode(matcher.encoding)
+        if len(self.regexes) >= self.MAX_SIZE:
+            self.regexes.clear()
+        regex = self.regexes[key] = re.compile(pattern)
+        return regex
+
+    def stats(self):
+        '''Return a human readable summary of the hit rate.'''
+        lookups = self.hits + self.misses
+        return '{} hits, {} misses, {:.1%} hit rate'.format(
+            self.hits, self.misses,
+            float(self.hits) / lookups if lookups else 0.
+        )
+
+
+regex_cache = RegexCache()
+
+
 class Matcher(object):
     '''Path pattern matcher
     Supports path matching similar to mozpath.match(), but does
@@ -39,6 +91,8 @@ class Matcher(object):
         parser = PatternParser()
         real_env = {k: parser.parse(v) for k, v in env.items()}
         self._cached_re = None
+        # the last path we matched, and the result
+        self._last_match = None
         if root is not None:
             # make sure that our root is fully expanded and ends with /
             root = mozpath.abspath(root) + '/'
@@ -77,6 +131,17 @@ class Matcher(object):
         Return None if there's no match, and the dictionary of matched
         variables in this matcher if there's a match.
         '''
+        # sub() and callers iterating over files match the same path
+        # in a row, reuse the result
+        last_match = self._last_match
+        if last_match is not None and last_match[0] == path:
+            d = last_match[1]
+            return None if d is None else d.copy()
+        d = self._match(path)
+        self._last_match = (path, d)
+        return None if d is None else d.copy()
+
+    def _match(self, path):
         self._cache_regex()
         m = self._cached_re.match(path)
         if m is None:
@@ -101,10 +166,7 @@ class Matcher(object):
     def _cache_regex(self):
         if self._cached_re is not None:
             return
-        pattern = self.pattern.regex_pattern(self.env) + '$'
-        if self.encoding is not None:
-            pattern = pattern.encode(self.encoding)
-        self._cached_re = re.compile(pattern)
+        self._cached_re = regex_cache.get(self)
 
     def sub(self, other, path):
         '''
@@ -180,6 +242,44 @@ class Matcher(object):
         return True
 
 
+class MatcherIndex(object):
+    '''Match paths against a list of Matchers.
+
+    The Matchers are indexed by the directory of their prefix, so that
+    only Matchers for the parent directories of a path are tried.
+    '''
+    def __init__(self, matchers):
+        self.matchers = list(matchers)
+        self._by_dir = defaultdict(list)
+        for index, matcher in enumerate(self.matchers):
+            prefix = matcher.prefix
+            slash = prefix.rfind(_sep(prefix))
+            self._by_dir[prefix[:slash + 1]].append(index)
+
+    def match(self, path):
+        '''Find the first Matcher matching the given path.
+
+        Return None if there's no match, and a tuple of the index
+        of the Matcher and the result of its match() otherwise.
+        '''
+        sep = _sep(path)
+        candidates = list(self._by_dir.get(path[:0], []))
+        slash = path.find(sep)
+        while slash >= 0:
+            candidates.extend(self._by_dir.get(path[:slash + 1], []))
+            slash = path.find(sep, slash + 1)
+        for index in sorted(candidates):
+            m = self.matchers[index].match(path)
+            if m is not None:
+                return index, m
+        return None
+
+
+def _sep(path):
+    # Matchers with an encoding work on bytes
+    return b'/' if isinstance(path, bytes) else '/'
+
+
 def expand(root, path, env):
     '''Expand a given path relative to the given root,
     using the given env to resolve variables.
@@ -204,6 +304,10 @@ class Node(object):
         '''Convert this node to a string with the given environment.'''
         raise NotImplementedError
 
+    def cache_key(self):
+        '''Hashable value identifying this Node.'''
+        raise NotImplementedError
+
 
 class Pattern(list, Node):
     def __init__(self, iterable=[]):
@@ -241,6 +345,9 @@ class Pattern(list, Node):
                     raise
                 return
 
+    def cache_key(self):
+        return (self.root,) + tuple(child.cache_key() for child in self)
+
     def __ne__(self, other):
         return not (self == other)
 
@@ -263,6 +370,9 @@ class Literal(six.text_type, Node):
     def expand(self, env, raise_missing=False):
         return self
 
+    def cache_key(self):
+        return six.text_type(self)
+
 
 class Variable(Node):
     def __init__(self, name, repeat=False):
@@ -304,6 +414,9 @@ class Variable(Node):
         env.pop(self.name)
         return env
 
+    def cache_key(self):
+        return (type(self).__name__, self.name, self.repeat)
+
     def __repr__(self):
         return 'Variable(name="{}")'.format(self.name)
 
@@ -375,6 +488,9 @@ class Star(Node):
     def expand(self, env, raise_missing=False):
         return env['s%d' % self.number]
 
+    def cache_key(self):
+        return (type(self).__name__, self.number)
+
     def __repr__(self):
         return type(self).__name__
 
@@ -395,6 +511,9 @@ class Starstar(Star):
     def regex_pattern(self, env):
         return '(?P<s{}>.+{})?'.format(self.number, self.suffix)
 
+    def cache_key(self):
+        return (type(self).__name__, self.number, self.suffix)
+
     def __ne__(self, other):
         return not (self == other)
 
@@ -3,6 +3,7 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import absolute_import
+from collections import OrderedDict
 import re
 from compare_locales import mozpath
 from .matcher import Matcher
@@ -32,10 +33,11 @@ class ProjectConfig(object):
         self.locales = None
         # cache for all_locales, as that's not in `filter`
         self._all_locales = None
+        self._all_locales_set = None
         self.environ = {}
         self.children = []
         self.excludes = []
-        self._cache = None
+        self.filter_caches = FilterCaches()
 
     def same(self, other):
         '''Equality test, ignoring locales.
@@ -71,6 +73,7 @@ class ProjectConfig(object):
         path pattern.
         '''
         self._all_locales = None  # clear cache
+        self.filter_caches.clear()
         for d in paths:
             rv = {
                 'l10n': Matcher(d['l10n'], env=self.environ, root=self.root),
@@ -112,11 +115,13 @@ class ProjectConfig(object):
         Assert that there's no legacy filter.py code hooked up.
         '''
         assert self.filter_py is None
+        self.filter_caches.clear()
         for rule in rules:
             self.rules.extend(self._compile_rule(rule))
 
     def add_child(self, child):
         self._all_locales = None  # clear cache
+        self.filter_caches.clear()
         if child.excludes:
             raise ExcludeError(
                 'Included configs cannot declare their own excludes.'
@@ -129,6 +134,7 @@ class ProjectConfig(object):
                 raise ExcludeError(
                     'Excluded configs cannot declare their own excludes.'
                 )
+        self.filter_caches.clear()
         self.excludes.append(child)
 
     def set_locales(self, locales, deep=False):
@@ -159,12 +165,17 @@ class ProjectConfig(object):
                     if 'locales' in paths:
                         all_locales.update(paths['locales'])
             self._all_locales = sorted(all_locales)
+            self._all_locales_set = frozenset(all_locales)
         return self._all_locales
 
+    def _has_locale(self, locale):
+        self.all_locales  # fill the caches
+        return locale in self._all_locales_set
+
     def filter(self, l10n_file, entity=None):
         '''Filter a localization file or entities within, according to
         this configuration file.'''
-        if l10n_file.locale not in self.all_locales:
+        if not self._has_locale(l10n_file.locale):
             return 'ignore'
         if self.filter_py is not None:
             return self.filter_py(l10n_file.module, l10n_file.file,
@@ -179,15 +190,19 @@ class ProjectConfig(object):
             self.locale = locale
             self.rules = []
             self.l10n_paths = []
+            # What doesn't depend on the entity, by l10n path.
+            # See ProjectConfig._file_filter.
+            self.files = {}
 
     def cache(self, locale):
-        if self._cache and self._cache.locale == locale:
-            return self._cache
-        self._cache = self.FilterCache(locale)
+        cached = self.filter_caches.get(locale)
+        if cached is not None:
+            return cached
+        cached = self.FilterCache(locale)
         for paths in self.paths:
             if 'locales' in paths and locale not in paths['locales']:
                 continue
-            self._cache.l10n_paths.append(paths['l10n'].with_env({
+            cached.l10n_paths.append(paths['l10n'].with_env({
                 "locale": locale
             }))
         for rule in self.rules:
@@ -195,35 +210,26 @@ class ProjectConfig(object):
             cached_rule['path'] = rule['path'].with_env({
                 "locale": locale
             })
-            self._cache.rules.append(cached_rule)
-        return self._cache
+            cached.rules.append(cached_rule)
+        self.filter_caches.add(cached)
+        return cached
 
     def _filter(self, l10n_file, entity=None):
-        if any(
-            exclude.filter(l10n_file) == 'error'
-            for exclude in self.excludes
-        ):
+        file_filter = self._file_filter(l10n_file)
+        if file_filter is None:
             return
+        children, rules = file_filter
         actions = set(
             child._filter(l10n_file, entity=entity)
-            for child in self.children)
+            for child in children)
         if 'error' in actions:
             # return early if we know we'll error
             return 'error'
 
-        cached = self.cache(l10n_file.locale)
-        if any(p.match(l10n_file.fullpath) for p in cached.l10n_paths):
-            action = 'error'
-            for rule in reversed(cached.rules):
-                if not rule['path'].match(l10n_file.fullpath):
-                    continue
-                if ('key' in rule) ^ (entity is not None):
-                    # key/file mismatch, not a matching rule
-                    continue
-                if 'key' in rule and not rule['key'].match(entity):
-                    continue
-                action = rule['action']
-                break
+        if rules is not None:
+            action = rules.action(entity)
+            if action is None:
+                action = 'error'
             actions.add(action)
         if 'error' in actions:
             return 'error'
@@ -232,6 +238,43 @@ class ProjectConfig(object):
         if 'ignore' in actions:
             return 'ignore'
 
+    def _file_filter(self, l10n_file):
+        '''Get the filter data for a file that doesn't depend on entities.
+
+        Returns None if the file is excluded. Otherwise, returns the
+        children which have paths or rules for the file, and the rules
+        for the file in reverse order. The rules are None if the file
+        doesn't match our paths, and a RuleIndex otherwise.
+        This is cached per locale and path.
+        '''
+        cached = self.cache(l10n_file.locale)
+        path = l10n_file.fullpath
+        try:
+            return cached.files[path]
+        except KeyError:
+            pass
+        file_filter = None
+        if not any(
+            exclude.filter(l10n_file) == 'error'
+            for exclude in self.excludes
+        ):
+            children = []
+            for child in self.children:
+                child_filter = child._file_filter(l10n_file)
+                if child_filter is None:
+                    continue
+                if child_filter[0] or child_filter[1] is not None:
+                    children.append(child)
+            rules = None
+            if any(p.match(path) for p in cached.l10n_paths):
+                rules = RuleIndex(
+                    rule for rule in reversed(cached.rules)
+                    if rule['path'].match(path)
+                )
+            file_filter = (children, rules)
+        cached.files[path] = file_filter
+        return file_filter
+
     def _compile_rule(self, rule):
         assert 'path' in rule
         if isinstance(rule['path'], list):
@@ -260,6 +303,143 @@ class ProjectConfig(object):
         if key.startswith('re:'):
             key = key[3:]
         else:
+            # plain keys are looked up in RuleIndex.keys
+            rule['literal_key'] = key
             key = re.escape(key) + '$'
         rule['key'] = re.compile(key)
         yield rule
+
+
+class FilterCaches(object):
+    '''The ProjectConfig.FilterCache objects of a config, by locale.
+
+    Filtering for different locales in turn doesn't rebuild the caches,
+    as long as there are no more than `max_size` locales. Beyond that,
+    the least recently used locales are dropped.
+    The counts of hits and misses are kept when the caches are cleared.
+    '''
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        self._caches = OrderedDict()
+        # most filter calls are for the same locale as the last one,
+        # skip the LRU bookkeeping for those
+        self._last = None
+
+    def __len__(self):
+        return len(self._caches)
+
+    def get(self, locale):
+        cached = self._last
+        if cached is None or cached.locale != locale:
+            cached = self._caches.pop(locale, None)
+            if cached is None:
+                self.misses += 1
+                return None
+            # re-insert as most recently used
+            self._caches[locale] = cached
+            self._last = cached
+        self.hits += 1
+        return cached
+
+    def add(self, cached):
+        self._caches[cached.locale] = cached
+        self._last = cached
+        while len(self._caches) > self.max_size:
+            self._caches.popitem(last=False)
+
+    def clear(self):
+        self._caches.clear()
+        self._last = None
+
+    def stats(self):
+        '''Return a human readable summary of the hit rate.'''
+        lookups = self.hits + self.misses
+        return '{} hits, {} misses, {:.1%} hit rate'.format(
+            self.hits, self.misses,
+            float(self.hits) / lookups if lookups else 0.
+        )
+
+
+class RuleIndex(object):
+    '''Find the first of a list of rules matching a file or entity.
+
+    The rules are the rules for one file, in order of precedence.
+    Plain keys are looked up in a dictionary. Key expressions are
+    combined into alternations, which try the expressions in order.
+    '''
+    # Python 2 doesn't support more groups in an expression
+    MAX_GROUPS = 99
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.file_action = None
+        # key -> (position, action)
+        self.keys = {}
+        # tuples of an expression and the positions of the rules
+        # for its groups, or None if it's a single rule
+        self.expressions = []
+        pending = []
+        for position, rule in enumerate(self.rules):
+            if 'key' not in rule:
+                if self.file_action is None:
+                    self.file_action = rule['action']
+                continue
+            if 'literal_key' in rule:
+                self.keys.setdefault(
+                    rule['literal_key'], (position, rule['action'])
+                )
+                continue
+            if rule['key'].groups:
+                # group numbers would change in an alternation
+                self._combine(pending)
+                pending = []
+                self.expressions.append((rule['key'], [position]))
+                continue
+            pending.append(position)
+            if len(pending) == self.MAX_GROUPS:
+                self._combine(pending)
+                pending = []
+        self._combine(pending)
+
+    def _combine(self, positions):
+        if not positions:
+            return
+        try:
+            expression = re.compile('|'.join(
+                '(' + self.rules[position]['key'].pattern + ')'
+                for position in positions
+            ))
+        except re.error:
+            # inline flags and the like, just try them one by one
+            for position in positions:
+                self.expressions.append(
+                    (self.rules[position]['key'], [position])
+                )
+            return
+        self.expressions.append((expression, positions))
+
+    def __len__(self):
+        return len(self.rules)
+
+    def action(self, entity=None):
+        '''Return the action of the first matching rule, or None.'''
+        if entity is None:
+            return self.file_action
+        found = self.keys.get(entity)
+        for expression, positions in self.expressions:
+            if found is not None and found[0] < positions[0]:
+                break
+            m = expression.match(entity)
+            if m is None:
+                continue
+            if len(positions) == 1:
+                position = positions[0]
+            else:
+                position = positions[m.lastindex - 1]
+            if found is None or position < found[0]:
+                found = (position, self.rules[position]['action'])
+            break
+        if found is None:
+            return None
+        return found[1]
@@ -25,7 +25,7 @@ from codecs import encode
 import six
 
 from compare_locales.merge import merge_resources, serialize_legacy_resource
-from compare_locales.parser import getParser
+from compare_locales.parser import createParser
 from compare_locales.parser.base import (
     Entity,
     PlaceholderEntity,
@@ -49,7 +49,7 @@ def serialize(filename, reference, old_l10n, new_data):
     format.
     '''
     try:
-        parser = getParser(filename)
+        parser = createParser(filename)
     except UserWarning:
         raise SerializationNotSupportedError(
             'Unsupported file format ({}).'.format(filename))
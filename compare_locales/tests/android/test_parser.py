@@ -126,3 +126,52 @@ class TestAndroidParser(ParserTestMixin, unittest.TestCase):
                 (DocumentWrapper, '</resources>')
             )
         )
+
+    def test_positions(self):
+        source = '''\
+<?xml version="1.0" encoding="utf-8"?>
+<resources>
+  <!-- käse -->
+  <string name='first'>wert &amp; &apos;</string>
+  <string name="second"/>
+</resources>
+'''
+        self.parser.readUnicode(source)
+        first, second = list(self.parser)
+        # entities refer to the original text
+        self.assertEqual(
+            first.all,
+            "<!-- käse -->\n  "
+            "<string name='first'>wert &amp; &apos;</string>"
+        )
+        self.assertEqual(first.val, "wert & '")
+        self.assertEqual(first.position(), (4, 3))
+        self.assertEqual(first.value_position(), (4, 24))
+        self.assertEqual(first.pre_comment.position(), (3, 3))
+        self.assertEqual(
+            source[first.key_span[0]:first.key_span[1]], 'first'
+        )
+        self.assertEqual(second.all, '<string name="second"/>')
+        self.assertEqual(second.position(), (5, 3))
+        self.assertEqual(second.position(-1), (5, 26))
+
+    def test_wrap(self):
+        source = '''\
+<?xml version="1.0" encoding="utf-8"?>
+<resources>
+  <string name="text">value</string>
+  <string name="cdata"> <![CDATA[<b>value</b>]]> </string>
+  <string name="empty"/>
+</resources>
+'''
+        self.parser.readUnicode(source)
+        self.assertListEqual(
+            [entity.wrap('<new> & "value"').all for entity in self.parser],
+            [
+                '<string name="text">&lt;new&gt; &amp; &quot;value&quot;'
+                '</string>',
+                '<string name="cdata"> <![CDATA[<new> & "value"]]> </string>',
+                '<string name="empty">&lt;new&gt; &amp; &quot;value&quot;'
+                '</string>',
+            ]
+        )
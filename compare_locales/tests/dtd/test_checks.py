@@ -5,6 +5,7 @@
 
 from __future__ import absolute_import
 from __future__ import unicode_literals
+import mock
 import unittest
 
 from compare_locales.checks import getChecker
@@ -13,6 +14,7 @@ from compare_locales.paths import File
 from compare_locales.tests import BaseHelper
 import six
 from six.moves import range
+from xml import sax
 
 
 class TestDTDs(BaseHelper):
@@ -108,6 +110,36 @@ stuff">
             )
         )
 
+    def test_reuse_reference_state(self):
+        p = getParser(self.file.file)
+        p.readContents(b'''<!ENTITY foo "Some &brandShortName;">
+<!ENTITY some.key "Other">
+''')
+        l10n = p.parse()
+        state = {}
+        with mock.patch(
+            'compare_locales.checks.dtd.sax.make_parser',
+            wraps=sax.make_parser
+        ) as make_parser:
+            for _ in range(2):
+                checker = getChecker(self.file)
+                checker.set_reference(self.refList, state=state)
+                for entity in l10n:
+                    self.assertEqual(
+                        tuple(checker.check(self.refList[entity.key], entity)),
+                        (
+                            ('warning', (0, 0),
+                             'Referencing unknown entity `brandShortName`',
+                             'xmlparse'),
+                        ) if entity.key == 'foo' else ()
+                    )
+        # one XML parser per checker
+        self.assertEqual(make_parser.call_count, 2)
+        self.assertSetEqual(set(state), {
+            'known_entities', 'known_declarations'
+        })
+        self.assertEqual(state['known_declarations'], b'')
+
 
 class TestEntitiesInDTDs(BaseHelper):
     file = File('foo.dtd', 'foo.dtd')
@@ -177,6 +177,7 @@ escaped value">
         self.assertEqual(b.count_words(), 2)
         self.assertEqual(c.count_words(), 1)
         self.assertEqual(d.count_words(), 3)
+        self.assertEqual(parser.count_words([a, b, c, d]), [1, 2, 1, 3])
 
     def test_html_entities(self):
         self.parser.readContents(b'''\
@@ -9,6 +9,8 @@ import textwrap
 import unittest
 
 from compare_locales.tests import BaseHelper
+from compare_locales.checks import getChecker
+from compare_locales import parser
 from compare_locales.paths import File
 
 
@@ -576,6 +578,34 @@ broken =
                 ),
             ))
 
+    def test_shared_reference(self):
+        l10n_parser = parser.getParser(self.file.file)
+        l10n_parser.readContents(dedent_ftl(
+            '''\
+            simple =
+                .style = max-width:2px
+            '''))
+        l10n = list(l10n_parser)[0]
+        ref = self.refList['simple']
+        state = {}
+        results = []
+        for locale in ('de', 'fr'):
+            checker = getChecker(File('foo.ftl', 'foo.ftl', locale=locale))
+            checker.set_reference(self.refList, state=state)
+            results.append(tuple(checker.check(ref, l10n)))
+            results.append(tuple(checker.check(ref, l10n)))
+        self.assertEqual(list(state['reference_visitors']), [ref.entry])
+        self.assertEqual(
+            results,
+            [(
+                (
+                    'warning', 0,
+                    'width only in reference, max-width only in l10n',
+                    'fluent'
+                ),
+            )] * 4
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
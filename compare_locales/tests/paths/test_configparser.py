@@ -4,10 +4,16 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import absolute_import, unicode_literals
+import os
+import shutil
+import tempfile
 import unittest
+import mock
 import six
 
 from . import MockTOMLParser
+from compare_locales.paths import TOMLParser
+from compare_locales.paths.configparser import ConfigCache
 from compare_locales.paths.matcher import Matcher
 from compare_locales.paths.project import ProjectConfig, ExcludeError
 from compare_locales import mozpath
@@ -124,3 +130,120 @@ basepath = "."
         self.assertNotIn("reference", paths[0])
         self.assertIn("test", paths[0])
         self.assertListEqual(paths[0]["test"], ["run_this"])
+
+    def test_shared_includes(self):
+        parser = MockTOMLParser({
+            "root.toml": """
+basepath = "."
+[[includes]]
+  path = "one.toml"
+[[includes]]
+  path = "two.toml"
+""",
+            "one.toml": """
+basepath = "."
+[[includes]]
+  path = "shared.toml"
+""",
+            "two.toml": """
+basepath = "."
+[[includes]]
+  path = "shared.toml"
+""",
+            "shared.toml": """
+basepath = "."
+""",
+        })
+        with mock.patch.object(
+            parser, 'load', wraps=parser.load
+        ) as load:
+            config = parser.parse("root.toml")
+        self.assertEqual(load.call_count, 4)
+        one, two = config.children
+        self.assertIs(one.children[0], two.children[0])
+
+
+class TestConfigCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = mozpath.join(self.tmp, 'cache')
+        self.write('l10n.toml', """
+basepath = "."
+[[paths]]
+  l10n = "{l10n_base}/{locale}/*"
+[[includes]]
+  path = "child.toml"
+""")
+        self.write('child.toml', """
+basepath = "."
+[[paths]]
+  l10n = "{l10n_base}/{locale}/{child}/*"
+""")
+        self.path = mozpath.join(self.tmp, 'l10n.toml')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, content):
+        with open(mozpath.join(self.tmp, name), 'w') as f:
+            f.write(content)
+
+    def parse(self, **env):
+        env.setdefault('l10n_base', '/l10n')
+        return TOMLParser(cache_dir=self.cache_dir).parse(self.path, env=env)
+
+    def l10n_paths(self, config):
+        return [
+            paths['l10n'].with_env({'locale': 'de'}).prefix
+            for c in config.configs
+            for paths in c.paths
+        ]
+
+    def test_cache(self):
+        config = self.parse(child='one')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        with mock.patch.object(
+            TOMLParser, 'load', side_effect=AssertionError('cached')
+        ):
+            cached = self.parse(child='one')
+        self.assertTrue(config.same(cached))
+        self.assertListEqual(
+            self.l10n_paths(cached), ['/l10n/de/', '/l10n/de/one/']
+        )
+        # other defines are cached separately
+        self.assertListEqual(
+            self.l10n_paths(self.parse(child='two')),
+            ['/l10n/de/', '/l10n/de/two/']
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        # changing an included file invalidates the cache
+        self.write('child.toml', """
+basepath = "."
+""")
+        self.assertListEqual(
+            self.l10n_paths(self.parse(child='one')), ['/l10n/de/']
+        )
+        ConfigCache(self.cache_dir).clear()
+        self.assertListEqual(os.listdir(self.cache_dir), [])
+
+    def test_missing_include(self):
+        os.remove(mozpath.join(self.tmp, 'child.toml'))
+        parser = TOMLParser(cache_dir=self.cache_dir)
+        config = parser.parse(
+            self.path, env={'l10n_base': '/l10n'},
+            ignore_missing_includes=True
+        )
+        self.assertEqual(self.l10n_paths(config), ['/l10n/de/'])
+        # adding the include invalidates the cache
+        self.write('child.toml', """
+basepath = "."
+[[paths]]
+  l10n = "{l10n_base}/{locale}/child/*"
+""")
+        config = parser.parse(
+            self.path, env={'l10n_base': '/l10n'},
+            ignore_missing_includes=True
+        )
+        self.assertListEqual(
+            self.l10n_paths(config), ['/l10n/de/', '/l10n/de/child/']
+        )
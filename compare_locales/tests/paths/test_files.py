@@ -4,11 +4,16 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import absolute_import
+import os
+import shutil
+import tempfile
 import unittest
 import mock
 
+from compare_locales import mozpath
 from compare_locales.paths import (
     File,
+    FileIndex,
     ProjectConfig,
     ProjectFiles,
 )
@@ -63,6 +68,91 @@ class TestMockOS(Rooted, unittest.TestCase):
         self.assertEqual(self.node.find('jazz'), self.node)
 
 
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.stage = mozpath.normpath(tempfile.mkdtemp())
+        for leaf in (
+            'en-US/one.ftl',
+            'en-US/sub/two.ftl',
+            'de/one.ftl',
+        ):
+            path = mozpath.join(self.stage, leaf)
+            if not os.path.isdir(mozpath.dirname(path)):
+                os.makedirs(mozpath.dirname(path))
+            open(path, 'w').close()
+        self.index = FileIndex()
+
+    def tearDown(self):
+        shutil.rmtree(self.stage)
+
+    def test_walk(self):
+        def walk(walker):
+            return sorted(
+                (d, sorted(dirs), sorted(files))
+                for d, dirs, files in walker
+            )
+
+        self.assertListEqual(
+            walk(self.index.walk(self.stage)),
+            walk(
+                (mozpath.normsep(d), dirs, files)
+                for d, dirs, files in os.walk(self.stage)
+            )
+        )
+        self.assertListEqual(
+            list(self.index.walk(mozpath.join(self.stage, 'fr'))),
+            []
+        )
+
+    def test_isfile(self):
+        self.assertTrue(
+            self.index.isfile(mozpath.join(self.stage, 'de/one.ftl')))
+        self.assertFalse(
+            self.index.isfile(mozpath.join(self.stage, 'de/two.ftl')))
+        self.assertFalse(
+            self.index.isfile(mozpath.join(self.stage, 'en-US/sub')))
+        self.assertFalse(
+            self.index.isfile(mozpath.join(self.stage, 'fr/one.ftl')))
+        self.assertTrue(self.index.exists(mozpath.join(self.stage, 'de')))
+        self.assertTrue(
+            self.index.exists(mozpath.join(self.stage, 'en-US/sub')))
+        self.assertFalse(self.index.exists(mozpath.join(self.stage, 'fr')))
+        # lookups use sets of the names
+        _, _, _, dir_names, file_names = self.index.listing(
+            mozpath.join(self.stage, 'en-US')
+        )
+        self.assertEqual(dir_names, frozenset(['sub']))
+        self.assertEqual(file_names, frozenset(['one.ftl']))
+
+    @unittest.skipIf(not hasattr(os, 'scandir'), 'needs os.scandir')
+    def test_snapshot(self):
+        with mock.patch(
+            'compare_locales.paths.files.scandir',
+            wraps=os.scandir
+        ) as scan:
+            list(self.index.walk(mozpath.join(self.stage, 'en-US')))
+            self.assertEqual(scan.call_count, 2)
+            self.assertTrue(
+                self.index.exists(mozpath.join(self.stage, 'en-US/one.ftl')))
+            self.assertEqual(scan.call_count, 2)
+        # later changes aren't picked up
+        os.remove(mozpath.join(self.stage, 'en-US/one.ftl'))
+        self.assertTrue(
+            self.index.exists(mozpath.join(self.stage, 'en-US/one.ftl')))
+
+    def test_project_files(self):
+        cfg = ProjectConfig(None)
+        cfg.add_environment(l10n_base=self.stage)
+        cfg.set_locales(['de'])
+        cfg.add_paths({
+            'reference': self.stage + '/en-US/**',
+            'l10n': '{l10n_base}/{locale}/**'
+        })
+        files = list(ProjectFiles('de', [cfg], file_index=self.index))
+        self.assertEqual(len(files), 2)
+        self.assertListEqual(files, list(ProjectFiles('de', [cfg])))
+
+
 class TestProjectPaths(Rooted, unittest.TestCase):
     def test_l10n_path(self):
         cfg = ProjectConfig(None)
@@ -7,7 +7,9 @@ from __future__ import absolute_import
 import six
 import unittest
 
-from compare_locales.paths.matcher import Matcher, ANDROID_STANDARD_MAP
+from compare_locales.paths.matcher import (
+    Matcher, MatcherIndex, RegexCache, ANDROID_STANDARD_MAP
+)
 from . import Rooted
 
 
@@ -289,6 +291,72 @@ class TestMatcher(unittest.TestCase):
         )
 
 
+class TestMatcherIndex(unittest.TestCase):
+    def test_match(self):
+        matchers = [
+            Matcher('foo/*.ftl'),
+            Matcher('foo/bar/**'),
+            Matcher('foo/ba*/*.ftl'),
+            Matcher('{var}/*', env={'var': 'foo'}),
+            Matcher('*.ftl'),
+        ]
+        index = MatcherIndex(matchers)
+        self.assertEqual(index.match('foo/one.ftl'), (0, {'s1': 'one'}))
+        self.assertEqual(
+            index.match('foo/bar/one.ftl'),
+            (1, {'s1': 'one.ftl'})
+        )
+        self.assertEqual(
+            index.match('foo/baz/one.ftl'),
+            (2, {'s1': 'z', 's2': 'one'})
+        )
+        self.assertEqual(
+            index.match('foo/one.properties'),
+            (3, {'var': 'foo', 's1': 'one.properties'})
+        )
+        self.assertEqual(index.match('one.ftl'), (4, {'s1': 'one'}))
+        self.assertIsNone(index.match('bar/one.ftl'))
+
+    def test_reuse_match(self):
+        one = Matcher('foo/*.ftl')
+        other = Matcher('bar/*.ftl')
+        d = one.match('foo/one.ftl')
+        self.assertEqual(d, {'s1': 'one'})
+        d['s1'] = 'changed'
+        # the remembered match isn't modified
+        self.assertEqual(one.sub(other, 'foo/one.ftl'), 'bar/one.ftl')
+        self.assertIsNone(one.match('foo/one.properties'))
+        self.assertIsNone(one.sub(other, 'foo/one.properties'))
+
+
+class TestRegexCache(unittest.TestCase):
+    def test_with_env(self):
+        cache = RegexCache()
+        base = Matcher('foo/{locale}/*.ftl')
+        de = cache.get(base.with_env({'locale': 'de'}))
+        self.assertIs(cache.get(base.with_env({'locale': 'de'})), de)
+        fr = cache.get(base.with_env({'locale': 'fr'}))
+        self.assertIsNot(fr, de)
+        self.assertIsNotNone(fr.match('foo/fr/one.ftl'))
+        self.assertIsNone(fr.match('foo/de/one.ftl'))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertEqual(
+            cache.stats(), '1 hits, 2 misses, 33.3% hit rate'
+        )
+
+    def test_key(self):
+        cache = RegexCache()
+        cache.get(Matcher('foo/*.ftl'))
+        # different root, pattern, encoding, or environment
+        cache.get(Matcher('foo/*.ftl', root='/bar'))
+        cache.get(Matcher('foo/**/*.ftl'))
+        cache.get(Matcher('foo/*.ftl', encoding='utf-8'))
+        cache.get(Matcher('foo/*.ftl', env={'x': 'y'}))
+        self.assertEqual((cache.hits, cache.misses), (0, 5))
+        cache.get(Matcher('foo/*.ftl'))
+        self.assertEqual((cache.hits, cache.misses), (1, 5))
+
+
 class ConcatTest(unittest.TestCase):
     def test_plain(self):
         left = Matcher('some/path/')
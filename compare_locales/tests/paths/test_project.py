@@ -6,7 +6,7 @@
 from __future__ import absolute_import
 import unittest
 
-from compare_locales.paths import ProjectConfig
+from compare_locales.paths import File, ProjectConfig
 from . import SetupMixin
 
 
@@ -163,6 +163,150 @@ class TestConfigRules(SetupMixin, unittest.TestCase):
         rv = self.cfg.filter(self.other_file)
         self.assertEqual(rv, 'ignore')
 
+    def test_file_filter_cache(self):
+        'Test that file level data is cached, with children and excludes'
+        self.cfg.add_paths({
+            'l10n': '/tmp/somedir/{locale}/browser/**'
+        })
+        self.cfg.add_rules(
+            {
+                'path': '/tmp/somedir/{locale}/browser/**',
+                'key': 'one_entity',
+                'action': 'ignore'
+            },
+            {
+                'path': '/tmp/somedir/{locale}/toolkit/**',
+                'key': 'one_entity',
+                'action': 'warning'
+            },
+        )
+        child = ProjectConfig(None)
+        child.set_locales(['de'])
+        child.add_paths({
+            'l10n': '/tmp/somedir/{locale}/toolkit/**'
+        })
+        child.add_rules({
+            'path': '/tmp/somedir/{locale}/toolkit/**',
+            'key': 're:other_.*',
+            'action': 'warning'
+        })
+        self.cfg.add_child(child)
+        for _ in range(2):
+            self.assertEqual(self.cfg.filter(self.file), 'error')
+            self.assertEqual(
+                self.cfg.filter(self.file, 'one_entity'), 'ignore')
+            self.assertEqual(
+                self.cfg.filter(self.other_file, 'one_entity'), 'error')
+            self.assertEqual(
+                self.cfg.filter(self.other_file, 'other_entity'), 'warning')
+        files = self.cfg.cache('de').files
+        children, rules = files[self.file.fullpath]
+        self.assertListEqual(children, [])
+        self.assertEqual(len(rules), 1)
+        children, rules = files[self.other_file.fullpath]
+        self.assertListEqual(children, [child])
+        self.assertIsNone(rules)
+        # adding an exclude clears the cache
+        exclude = ProjectConfig(None)
+        exclude.set_locales(['de'])
+        exclude.add_paths({
+            'l10n': '/tmp/somedir/{locale}/toolkit/**'
+        })
+        self.cfg.exclude(exclude)
+        self.assertEqual(
+            self.cfg.filter(self.other_file, 'other_entity'), 'ignore')
+        self.assertIsNone(
+            self.cfg.cache('de').files[self.other_file.fullpath])
+
+    def test_filter_caches(self):
+        'Test that filtering for locales in turn reuses their caches'
+        self.cfg.set_locales(['de', 'fr', 'it'])
+        self.cfg.add_paths({
+            'l10n': '/tmp/somedir/{locale}/browser/**'
+        })
+        fr_file, it_file = (
+            File(
+                '/tmp/somedir/{}/browser/one/two/file.ftl'.format(locale),
+                'file.ftl',
+                module='browser', locale=locale)
+            for locale in ('fr', 'it')
+        )
+        caches = self.cfg.filter_caches
+        for _ in range(3):
+            self.assertEqual(self.cfg.filter(self.file), 'error')
+            self.assertEqual(self.cfg.filter(fr_file), 'error')
+        self.assertEqual(len(caches), 2)
+        self.assertEqual((caches.hits, caches.misses), (4, 2))
+        # drop the least recently used locale
+        caches.max_size = 2
+        self.assertEqual(self.cfg.filter(it_file), 'error')
+        self.assertEqual(len(caches), 2)
+        self.assertEqual((caches.hits, caches.misses), (4, 3))
+        self.assertEqual(self.cfg.filter(fr_file), 'error')
+        self.assertEqual((caches.hits, caches.misses), (5, 3))
+        self.assertEqual(self.cfg.filter(self.file), 'error')
+        self.assertEqual((caches.hits, caches.misses), (5, 4))
+        # changing the config clears the caches, but not the counts
+        self.cfg.add_rules({
+            'path': '/tmp/somedir/{locale}/browser/**',
+            'action': 'ignore'
+        })
+        self.assertEqual(len(caches), 0)
+        self.assertEqual(self.cfg.filter(self.file), 'ignore')
+        self.assertEqual((caches.hits, caches.misses), (5, 5))
+
+
+class TestRuleIndex(SetupMixin, unittest.TestCase):
+    def setUp(self):
+        super(TestRuleIndex, self).setUp()
+        self.cfg.add_paths({
+            'l10n': '/tmp/somedir/{locale}/**'
+        })
+
+    def rules(self, *keys):
+        for key, action in keys:
+            self.cfg.add_rules({
+                'path': '/tmp/somedir/{locale}/browser/**',
+                'key': key,
+                'action': action,
+            })
+
+    def test_last_rule_wins(self):
+        self.rules(
+            ('re:one_.*', 'ignore'),
+            ('one_entity', 'warning'),
+            ('re:.*_entity', 'ignore'),
+            ('two_entity', 'warning'),
+            ('re:(?i)THREE.*', 'warning'),
+            ('re:(f)ou?r(?P<x>_)\\1', 'ignore'),
+        )
+        expected = {
+            'one_entity': 'ignore',
+            'one_other': 'ignore',
+            'two_entity': 'warning',
+            'three_entity': 'warning',
+            'four_f': 'ignore',
+            'for_entity': 'ignore',
+            'five': 'error',
+        }
+        for entity, action in expected.items():
+            self.assertEqual(
+                self.cfg.filter(self.file, entity), action, entity)
+
+    def test_many_rules(self):
+        self.rules(*[
+            ('re:key{}$'.format(i), 'ignore' if i % 2 else 'warning')
+            for i in range(250)
+        ])
+        self.rules(('re:key1.*', 'error'))
+        _, rules = self.cfg._file_filter(self.file)
+        self.assertEqual(len(rules), 251)
+        self.assertEqual(len(rules.expressions), 3)
+        self.assertEqual(self.cfg.filter(self.file, 'key249'), 'ignore')
+        self.assertEqual(self.cfg.filter(self.file, 'key248'), 'warning')
+        self.assertEqual(self.cfg.filter(self.file, 'key1'), 'error')
+        self.assertEqual(self.cfg.filter(self.file, 'key12'), 'error')
+
 
 class TestProjectConfig(unittest.TestCase):
     def test_children(self):
@@ -3,11 +3,15 @@
 
 from __future__ import absolute_import
 from __future__ import unicode_literals
+import shutil
+import tempfile
 import unittest
 
+from compare_locales import mozpath
 from compare_locales.tests import ParserTestMixin
 from compare_locales.parser import (
     BadEntity,
+    Junk,
     Whitespace,
 )
 
@@ -114,6 +118,23 @@ msgstr "translated string"
             )
         )
 
+    def test_bad_entity(self):
+        source = '''\
+msgctxt "context without id"
+msgstr "value"
+
+msgid "reference"
+msgstr "translated string"
+'''
+        self._test(
+            source,
+            (
+                (Junk, 'msgctxt "context without id"\nmsgstr "value"\n\n'),
+                (('reference', None), 'translated string'),
+                (Whitespace, '\n'),
+            )
+        )
+
     def test_translated(self):
         source = '''
 msgid "reference 1"
@@ -137,3 +158,29 @@ msgstr ""
             [e.localized for e in entities],
             [True, False]
         )
+
+    def test_streaming(self):
+        source = (
+            'msgctxt "menu"\n\nmsgid "Open"\nmsgstr "Ouvrir"\n'
+            'msgctxt "msgstr"\n\nmsgid "Close"\nmsgstr "Fermer"\n'
+            '#: msgstr\n msgid "Save"\n\nmsgstr "Enregistrer"\n'
+        ) * 3
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = mozpath.join(tmp, self.filename)
+        with open(path, 'wb') as fh:
+            fh.write(source.encode('utf-8'))
+        self.parser.readFile(path)
+        expected = [(type(e), e.key, e.all) for e in self.parser.walk()]
+        self.assertEqual(
+            [key for _, key, _ in expected[:5:2]],
+            [('Open', 'menu'), ('Close', 'msgstr'), ('Save', None)]
+        )
+        for block_size in [self.parser.stream_block_size] + list(range(8, 65)):
+            self.parser.stream_block_size = block_size
+            self.parser.readFile(path, stream=True)
+            self.assertEqual(
+                [(type(e), e.key, e.all) for e in self.parser.walk()],
+                expected,
+                block_size
+            )
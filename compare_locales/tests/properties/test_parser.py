@@ -13,6 +13,7 @@ from compare_locales.parser import (
     Comment,
     Junk,
     Whitespace,
+    count_words,
 )
 
 
@@ -208,6 +209,31 @@ three = three\xa0''', (
             ('three', 'three\xa0'),
         ))
 
+    def test_continuation_ends(self):
+        self._test('''\
+four = ends in \\\\\\\\
+trailing = first \\\n    second  \t
+blank = first \\\n   \n\
+end = last \\''', (
+            ('four', 'ends in \\\\'),
+            (Whitespace, '\n'),
+            ('trailing', 'first second'),
+            (Whitespace, '  \t\n'),
+            ('blank', 'first '),
+            (Whitespace, '   \n'),
+            ('end', 'last \\'),
+        ))
+        trailing, blank = list(self.parser)[1:3]
+        self.assertEqual(trailing.raw_val, 'first \\\n    second')
+        self.assertEqual(blank.raw_val, 'first \\\n')
+
+    def test_val_cache(self):
+        self.parser.readUnicode('one = escaped\\tvalue\ntwo = plain\n')
+        one, two = list(self.parser)
+        self.assertEqual(one.val, 'escaped\tvalue')
+        self.assertIs(one.val, one.val)
+        self.assertIs(two.val, two.val)
+
     def test_white_space_keys(self):
         self._test('''\
 o\\ e = one
@@ -238,6 +264,21 @@ second = string
             (Whitespace, '\n'),
         ))
 
+    def test_count_words(self):
+        self.parser.readUnicode('''\
+one = one <b>two</b>
+two = one\\u0000two three
+three = <br>
+''')
+        entities = [e for e in self.parser if not isinstance(e, Whitespace)]
+        self.assertEqual(
+            [e.count_words() for e in entities],
+            [2, 2, 0]
+        )
+        # the separator in the value of `two` makes us count one by one
+        self.assertEqual(count_words(entities), [2, 2, 0])
+        self.assertEqual(count_words(entities[:1] + entities[2:]), [2, 0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,75 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from __future__ import absolute_import
+import unittest
+
+from compare_locales import benchmarks
+from compare_locales import parser
+from compare_locales.benchmarks import corpus
+
+
+class TestCorpus(unittest.TestCase):
+    def test_formats(self):
+        for format in benchmarks.FORMATS:
+            p = parser.createParser(corpus.filename(format))
+            p.readContents(benchmarks.generate(format, 20))
+            reference = p.parse()
+            self.assertEqual(len(reference), 20, format)
+            p.readContents(benchmarks.generate(format, 20, 'de'))
+            localization = p.parse()
+            self.assertFalse(
+                [e for e in localization if isinstance(e, parser.Junk)],
+                format
+            )
+            # two missing, and one obsolete
+            self.assertEqual(len(localization), 19, format)
+
+    def test_deterministic(self):
+        self.assertEqual(
+            benchmarks.generate('ftl', 50, 'fr'),
+            benchmarks.generate('ftl', 50, 'fr')
+        )
+        self.assertNotEqual(
+            benchmarks.generate('ftl', 50, 'fr'),
+            benchmarks.generate('ftl', 50, 'de')
+        )
+
+
+class TestRunner(unittest.TestCase):
+    def test_run(self):
+        logged = []
+        results = benchmarks.run_benchmarks(
+            formats=['dtd', 'properties'],
+            sizes=[10],
+            locales=2,
+            repeat=1,
+            log=logged.append,
+        )
+        self.assertListEqual(logged, results)
+        self.assertListEqual(
+            [(r['benchmark'], r['format']) for r in results],
+            [
+                (benchmark, format)
+                for format in ('dtd', 'properties')
+                for benchmark in ('parse', 'walk', 'check', 'merge',
+                                  'serialize')
+            ] + [('compare', 'dtd,properties')]
+        )
+
+    def test_compare_reports(self):
+        def result(benchmark, seconds):
+            return {
+                'benchmark': benchmark,
+                'format': 'dtd',
+                'size': 10,
+                'seconds': seconds,
+            }
+        baseline = benchmarks.report([result('parse', 2.), result('walk', 1.)])
+        comparison = benchmarks.compare_reports(
+            baseline, [result('parse', 1.), result('check', 1.)]
+        )
+        self.assertListEqual(
+            comparison, [(result('parse', 1.), 2., .5)]
+        )
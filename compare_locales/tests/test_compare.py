@@ -3,9 +3,16 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import absolute_import
+import json
+import mock
+import os
+import shutil
+import tempfile
 import unittest
 
-from compare_locales import compare, paths
+import six
+
+from compare_locales import compare, mozpath, parser, paths
 
 
 class TestTree(unittest.TestCase):
@@ -80,6 +87,43 @@ two/other
             }
         )
 
+    def test_split(self):
+        tree = compare.Tree(list)
+        tree['one/two/three'].append(1)
+        # value on the common prefix of an existing branch
+        tree['one/two'].append(2)
+        tree['one/two/four/five'].append(3)
+        tree['one/two/three'].append(4)
+        tree['one/six'].append(5)
+        self.assertEqual(
+            list(tree.getContent()),
+            [
+                (0, 'key', ('one',)),
+                (1, 'key', ('six',)),
+                (2, 'value', [5]),
+                (1, 'key', ('two',)),
+                (2, 'value', [2]),
+                (2, 'key', ('four', 'five')),
+                (3, 'value', [3]),
+                (2, 'key', ('three',)),
+                (3, 'value', [1, 4]),
+            ]
+        )
+
+    def test_items(self):
+        tree = compare.Tree(list)
+        tree['one/entry'].append(1)
+        tree['one/other'].append(2)
+        tree['two'].append(3)
+        self.assertListEqual(
+            sorted(tree.items()),
+            [
+                ('one/entry', [1]),
+                ('one/other', [2]),
+                ('two', [3]),
+            ]
+        )
+
 
 class TestObserver(unittest.TestCase):
     def test_simple(self):
@@ -145,6 +189,341 @@ class TestObserver(unittest.TestCase):
             }
         })
 
+    def test_merge(self):
+        obs = compare.Observer()
+        f = paths.File('/some/real/sub/path', 'de/sub/path', locale='de')
+        obs.notify('missingEntity', f, 'one')
+        obs.updateStats(f, {'missing': 15})
+        other = compare.Observer()
+        f = paths.File('/some/real/sub/path', 'fr/sub/path', locale='fr')
+        other.notify('error', f, 'bad')
+        other.updateStats(f, {'changed': 3})
+        obs.merge(other)
+        self.assertTrue(obs.error)
+        data = obs.toJSON()
+        self.assertEqual(data['summary']['de']['missing'], 15)
+        self.assertEqual(data['summary']['fr']['changed'], 3)
+        self.assertEqual(data['summary']['fr']['errors'], 1)
+        self.assertDictEqual(data['details'], {
+            'de/sub/path': [{'missingEntity': 'one'}],
+            'fr/sub/path': [{'error': 'bad'}],
+        })
+
+
+class TestCompareProjects(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.l10n_base = mozpath.join(self.tmp, 'l10n')
+        self.write('en/one.properties', 'one = One\ntwo = Two\n')
+        self.write('en/two.properties', 'three = Three\n')
+        self.write('l10n/de/one.properties', 'one = Eins\ntwo = Two\n')
+        self.write('l10n/fr/one.properties', 'one = Un\nfour = 4\n')
+        self.write('l10n/fr/two.properties', 'three = Trois\n')
+        self.write('l10n/it/one.properties', 'one = Uno\ntwo = Due %s\n')
+        self.write('l10n/it/old.properties', 'old = Vecchio\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, path, content):
+        path = mozpath.join(self.tmp, path)
+        if not os.path.isdir(mozpath.dirname(path)):
+            os.makedirs(mozpath.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def config(self):
+        cfg = paths.ProjectConfig(None)
+        cfg.add_environment(l10n_base=self.l10n_base)
+        cfg.set_locales(['de', 'fr', 'it'])
+        cfg.add_paths({
+            'l10n': '{l10n_base}/{locale}/*',
+            'reference': mozpath.join(self.tmp, 'en', '*'),
+        })
+        return cfg
+
+    def test_parallel(self):
+        serial = compare.compareProjects(
+            [self.config()], [], self.l10n_base
+        )
+        parallel = compare.compareProjects(
+            [self.config()], [], self.l10n_base, jobs=2
+        )
+        self.assertDictEqual(parallel.toJSON(), serial.toJSON())
+        self.assertListEqual(
+            [o.toJSON() for o in parallel],
+            [o.toJSON() for o in serial]
+        )
+        self.assertEqual(
+            parallel.serializeDetails(), serial.serializeDetails()
+        )
+        self.assertEqual(
+            parallel.serializeSummaries(), serial.serializeSummaries()
+        )
+        self.assertEqual(parallel.error, serial.error)
+        self.assertIn('fr/one.properties', parallel.serializeDetails())
+
+    def test_result_cache(self):
+        cache_dir = mozpath.join(self.tmp, 'cache')
+        fresh = compare.compareProjects(
+            [self.config()], [], self.l10n_base, cache_dir=cache_dir
+        )
+        self.assertEqual(len(os.listdir(cache_dir)), 4)
+        with mock.patch.object(
+            compare.ContentComparer, 'compare_entities',
+            side_effect=AssertionError('should not compare')
+        ):
+            cached = compare.compareProjects(
+                [self.config()], [], self.l10n_base, cache_dir=cache_dir
+            )
+        self.assertDictEqual(cached.toJSON(), fresh.toJSON())
+        self.assertEqual(cached.serializeDetails(), fresh.serializeDetails())
+        # changed files are compared again
+        self.write('l10n/de/one.properties', 'one = Eins\n')
+        changed = compare.compareProjects(
+            [self.config()], [], self.l10n_base, cache_dir=cache_dir
+        )
+        self.assertEqual(changed.toJSON()['summary']['de']['missing'], 2)
+        self.assertEqual(len(os.listdir(cache_dir)), 5)
+
+    def test_copy_of_reference(self):
+        self.write('en/three.properties', 'four = Four\nfoo\n')
+        for name, content in (
+            ('two.properties', 'three = Three\n'),
+            ('three.properties', 'four = Four\nfoo\n'),
+        ):
+            self.write('l10n/de/' + name, content)
+            ref = paths.File(mozpath.join(self.tmp, 'en', name), name)
+            l10n = paths.File(
+                mozpath.join(self.l10n_base, 'de', name), 'de/' + name,
+                locale='de'
+            )
+            comparer = compare.ContentComparer()
+            comparer.observers.append(compare.Observer())
+            comparer.compare(ref, l10n, None)
+            parsed = compare.ContentComparer()
+            parsed.observers.append(compare.Observer())
+            with mock.patch.object(
+                compare.cache.CachedReference, 'is_copy', return_value=False
+            ):
+                parsed.compare(ref, l10n, None)
+            self.assertDictEqual(
+                comparer.observers.toJSON(), parsed.observers.toJSON()
+            )
+            if name == 'two.properties':
+                self.assertEqual(comparer.fast_path['copies'], 1)
+            else:
+                # files with Junk are always parsed
+                self.assertEqual(comparer.fast_path['copies'], 0)
+
+    def test_copy_of_reference_plurals(self):
+        content = '# Localization_and_Plurals\nplural = One;Many\n'
+        self.write('en/plural.properties', content)
+        ref = paths.File(
+            mozpath.join(self.tmp, 'en', 'plural.properties'),
+            'plural.properties'
+        )
+        comparer = compare.ContentComparer()
+        comparer.observers.append(compare.Observer())
+        for locale in ('de', 'ru', 'nl'):
+            self.write('l10n/{}/plural.properties'.format(locale), content)
+            comparer.compare(ref, paths.File(
+                mozpath.join(self.l10n_base, locale, 'plural.properties'),
+                locale + '/plural.properties',
+                locale=locale
+            ), None)
+        self.assertEqual(comparer.fast_path['copies'], 3)
+        summary = comparer.observers.toJSON()['summary']
+        self.assertEqual(summary['de']['warnings'], 0)
+        # Russian has three plural forms
+        self.assertEqual(summary['ru']['warnings'], 1)
+        self.assertEqual(summary['nl']['warnings'], 0)
+
+    def test_copy_of_reference_doUnchanged(self):
+        content = 'one = One\ntwo = Two\n'
+        self.write('en/copy.properties', content)
+        self.write('l10n/de/copy.properties', content)
+
+        class Comparer(compare.ContentComparer):
+            def doUnchanged(self, entity):
+                unchanged.append(entity.key)
+
+        unchanged = []
+        comparer = Comparer()
+        comparer.observers.append(compare.Observer())
+        comparer.compare(
+            paths.File(
+                mozpath.join(self.tmp, 'en', 'copy.properties'),
+                'copy.properties'
+            ),
+            paths.File(
+                mozpath.join(self.l10n_base, 'de', 'copy.properties'),
+                'de/copy.properties',
+                locale='de'
+            ),
+            None
+        )
+        self.assertEqual(comparer.fast_path['copies'], 0)
+        self.assertEqual(unchanged, ['one', 'two'])
+
+    def test_json_stream(self):
+        serial = compare.compareProjects(
+            [self.config()], [], self.l10n_base
+        )
+        for jobs in (1, 2):
+            stream = compare.JSONStream(six.StringIO())
+            observers = compare.compareProjects(
+                [self.config()], [], self.l10n_base,
+                jobs=jobs, stream=stream, details=False
+            )
+            self.assertIsNone(observers.details)
+            records = [
+                json.loads(line)
+                for line in stream.fh.getvalue().splitlines()
+            ]
+            self.assertDictEqual(
+                records.pop(),
+                {'summary': [serial.observers[0].toJSON()['summary']]}
+            )
+            self.assertListEqual(
+                [(r['locale'], r['path']) for r in records],
+                [
+                    ('de', 'de/one.properties'),
+                    ('de', 'de/two.properties'),
+                    ('fr', 'fr/one.properties'),
+                    ('fr', 'fr/two.properties'),
+                    ('it', 'it/old.properties'),
+                    ('it', 'it/one.properties'),
+                    ('it', 'it/two.properties'),
+                ]
+            )
+            self.assertDictEqual(
+                records[2],
+                {
+                    'project': 0,
+                    'locale': 'fr',
+                    'path': 'fr/one.properties',
+                    'details': [
+                        {'obsoleteEntity': 'four'},
+                        {'missingEntity': 'two'},
+                    ],
+                    'stats': {
+                        'missing': 1, 'missing_w': 1,
+                        'obsolete': 1, 'report': 0,
+                        'changed': 1, 'changed_w': 1,
+                        'unchanged': 0, 'unchanged_w': 0,
+                        'keys': 0,
+                    },
+                }
+            )
+
+
+class TestReferenceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.parser = parser.getParser('file.properties')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def file(self, name, content):
+        path = mozpath.join(self.tmp, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return paths.File(path, name)
+
+    def test_reuse(self):
+        cache = compare.ReferenceCache()
+        ref = self.file('one.properties', 'one = One two\n')
+        cached = cache.get(self.parser, ref)
+        self.assertIs(cache.get(self.parser, ref), cached)
+        self.assertEqual(cached.count_words('one'), 2)
+        self.assertEqual(cached.file_stats(), (1, 2))
+        self.assertEqual(cache.size, 14)
+        # changing the file invalidates the cache
+        ref = self.file('one.properties', 'one = One\ntwo = Two\n')
+        changed = cache.get(self.parser, ref)
+        self.assertIsNot(changed, cached)
+        self.assertEqual(changed.file_stats(), (2, 2))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 20)
+
+    def test_evict(self):
+        cache = compare.ReferenceCache(max_size=30)
+        one = self.file('one.properties', 'one = One\n')
+        two = self.file('two.properties', 'two = Two\n')
+        three = self.file('three.properties', 'three = Three\n')
+        cached_one = cache.get(self.parser, one)
+        cache.get(self.parser, two)
+        # use one, so that two is the least recently used
+        cache.get(self.parser, one)
+        cache.get(self.parser, three)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.size, 24)
+        self.assertIs(cache.get(self.parser, one), cached_one)
+        self.assertEqual(len(cache), 2)
+
+    def test_error(self):
+        cache = compare.ReferenceCache()
+        with self.assertRaises(EnvironmentError):
+            cache.get(self.parser, paths.File(
+                mozpath.join(self.tmp, 'missing.properties'),
+                'missing.properties'
+            ))
+        self.assertEqual(len(cache), 0)
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = mozpath.join(self.tmp, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def file(self, name, content):
+        path = mozpath.join(self.tmp, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return paths.File(path, name, locale='de')
+
+    def test_key(self):
+        cache = compare.ResultCache(self.cache_dir)
+        ref = self.file('ref.po', 'msgid "one"\nmsgstr ""\n')
+        l10n = self.file('l10n.po', 'msgid "one"\nmsgstr "eins"\n')
+        key = cache.key(ref, l10n, None)
+        self.assertEqual(key, cache.key(ref, l10n, []))
+        self.assertNotEqual(key, cache.key(ref, l10n, ['android-dtd']))
+        self.assertIsNone(cache.get(key))
+        events = [
+            ('missingEntity', ('one', None), 1),
+            ('keys',),
+            ('error', 'bad'),
+        ]
+        cache.set(key, events)
+        self.assertListEqual(cache.get(key), events)
+        self.file('l10n.po', 'msgid "one"\nmsgstr "zwei"\n')
+        self.assertNotEqual(key, cache.key(ref, l10n, None))
+        cache.clear()
+        self.assertIsNone(cache.get(key))
+        missing = paths.File(
+            mozpath.join(self.tmp, 'missing.po'), 'missing.po', locale='de'
+        )
+        self.assertIsNone(cache.key(ref, missing, None))
+
+    def test_prune(self):
+        cache = compare.ResultCache(self.cache_dir, max_size=100)
+        for i in range(10):
+            cache.set('key%d' % i, [('error', 'x' * 20)])
+            os.utime(cache._path('key%d' % i), (i, i))
+        entries = sorted(os.listdir(self.cache_dir))
+        self.assertLess(len(entries), 10)
+        self.assertIn('key9.json', entries)
+        self.assertNotIn('key0.json', entries)
+        self.assertLessEqual(
+            sum(size for _, size, _ in cache._entries()), 100
+        )
+
 
 class TestAddRemove(unittest.TestCase):
 
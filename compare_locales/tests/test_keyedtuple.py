@@ -52,3 +52,13 @@ class TestKeyedTuple(unittest.TestCase):
             ('one', 'two', 'one', 'two',),
             tuple((k for k, v in items))
         )
+
+    def test_lazy_index(self):
+        things = [KeyedThing('one', 'thing'), KeyedThing('two', 'things')]
+        keyedtuple = KeyedTuple(things)
+        self.assertEqual(list(keyedtuple), things)
+        self.assertEqual(keyedtuple[1], things[1])
+        self.assertEqual(keyedtuple[:1], tuple(things[:1]))
+        self.assertIsNone(keyedtuple._KeyedTuple__map)
+        self.assertEqual(keyedtuple['two'], things[1])
+        self.assertEqual(keyedtuple._KeyedTuple__map, {'one': 0, 'two': 1})
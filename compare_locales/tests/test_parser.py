@@ -3,10 +3,11 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import absolute_import
-import pkg_resources
+import mock
 import shutil
 import tempfile
 import textwrap
+import threading
 import unittest
 
 from compare_locales import parser, mozpath
@@ -68,6 +69,66 @@ class TestOffsetComment(unittest.TestCase):
         )
 
 
+class TestTokenizer(unittest.TestCase):
+    def test_kinds(self):
+        p = parser.DTDParser()
+        contents = '<!-- comment -->\n\n<!ENTITY key "value">junk'
+        tokenizer = p.tokenizer
+        m = tokenizer.match(contents, 0)
+        self.assertEqual(m.lastgroup, 'comment')
+        m = tokenizer.match(contents, m.end())
+        self.assertEqual(m.lastgroup, 'white')
+        m = tokenizer.match(contents, m.end())
+        self.assertEqual(m.lastgroup, 'entity')
+        self.assertEqual(m.group('key'), 'key')
+        self.assertEqual(m.group('val'), '"value"')
+        self.assertIsNone(tokenizer.match(contents, m.end()))
+
+    def test_standalone_comment(self):
+        p = parser.PropertiesParser()
+        p.readUnicode('# comment\n\nkey = value\n')
+        with mock.patch.object(
+            p.tokenizer, 'match', wraps=p.tokenizer.match
+        ) as match:
+            entries = list(p.walk())
+        self.assertEqual(
+            [type(entry).__name__ for entry in entries],
+            ['OffsetComment', 'Whitespace', 'PropertiesEntity', 'Whitespace']
+        )
+        # the blank lines after the comment are only matched once
+        self.assertEqual(
+            [args[1] for args, _ in match.call_args_list],
+            [0, 9, 11, 22]
+        )
+
+
+class TestSlots(unittest.TestCase):
+    def test_no_dict(self):
+        contents = {
+            'file.properties': '# comment\n\nkey = value\njunk\n',
+            'file.dtd': '<!-- comment -->\n<!ENTITY key "value">\n',
+            'file.ftl': '# comment\n\nkey = value\n    .attr = a\n-term = t\n',
+            'file.ini': '; comment\n[Strings]\nkey=value\n',
+            'file.inc': '# comment\n#filter emptyLines\n#define key value\n',
+            'file.po': '# comment\nmsgid "key"\nmsgstr "value"\n',
+            'strings.xml': (
+                '<?xml version="1.0" encoding="utf-8"?>\n<resources>\n'
+                '<!-- comment -->\n<string name="key">value</string>\n'
+                '</resources>\n'
+            ),
+        }
+        for path, content in contents.items():
+            p = parser.createParser(path)
+            p.readUnicode(content)
+            for entity in p.walk():
+                self.assertFalse(
+                    hasattr(entity, '__dict__'),
+                    '%s in %s' % (type(entity).__name__, path)
+                )
+                for attr in getattr(entity, 'attributes', []):
+                    self.assertFalse(hasattr(attr, '__dict__'))
+
+
 class TestUniversalNewlines(unittest.TestCase):
     def setUp(self):
         '''Create a parser for this test.
@@ -90,27 +151,169 @@ class TestUniversalNewlines(unittest.TestCase):
             'one\ntwo\nthree\n')
 
 
-class TestPlugins(unittest.TestCase):
+class TestStreaming(unittest.TestCase):
     def setUp(self):
-        self.old_working_set_state = pkg_resources.working_set.__getstate__()
-        distribution = pkg_resources.Distribution(__file__)
-        entry_point = pkg_resources.EntryPoint.parse(
-            'test_parser = compare_locales.tests.test_parser:DummyParser',
-            dist=distribution
-        )
-        distribution._ep_map = {
-            'compare_locales.parsers': {
-                'test_parser': entry_point
-            }
-        }
-        pkg_resources.working_set.add(distribution)
+        self.dir = tempfile.mkdtemp()
 
     def tearDown(self):
-        pkg_resources.working_set.__setstate__(self.old_working_set_state)
+        shutil.rmtree(self.dir)
+
+    def _test(self, filename, content):
+        path = mozpath.join(self.dir, filename)
+        with open(path, 'wb') as fh:
+            fh.write(content.encode('utf-8'))
+
+        def fragments(p):
+            # Junk keys have a global counter, skip them
+            return [
+                (
+                    type(entity),
+                    None if isinstance(entity, parser.Junk) else entity.key,
+                    entity.val, entity.all,
+                    entity.position(), entity.position(-1),
+                )
+                for entity in p.walk()
+            ]
+
+        p = parser.createParser(filename)
+        p.readFile(path)
+        expected = fragments(p)
+        # try every position of the chunk boundaries
+        for block_size in range(8, 65):
+            p = parser.createParser(filename)
+            p.stream_block_size = block_size
+            p.readFile(path, stream=True)
+            self.assertIsNone(p.ctx)
+            contexts = set()
+            found = []
+            for entity in p.walk():
+                contexts.add(p.ctx)
+                found.append(entity)
+            self.assertGreater(len(contexts), 3)
+            p.readFile(path, stream=True)
+            self.assertEqual(fragments(p), expected, block_size)
+            self.assertEqual(len(found), len(expected))
+
+    def test_properties(self):
+        self._test('file.properties', textwrap.dedent('''\
+            # License header
+
+            key = value
+            # comment
+            multi = line \\
+
+            value
+
+            # License in the middle
+            key2 = value
+            junk without separator
+
+            junk more junk
+            key3 = value
+            ''') * 5)
+
+    def test_po(self):
+        self._test('file.po', textwrap.dedent('''\
+            # License header
+
+            # comment
+            msgid "key"
+            msgstr "value"
+
+            msgid "multi"
+            msgstr ""
+
+            "line"
+
+            junk
+            msgctxt "context"
+            msgid "key"
+            msgstr "other"
+
+            # comment before a blank line
+
+            msgid "glued"
+            msgstr "to the comment"
+            ''') * 5)
+
+    def test_ini(self):
+        self._test('file.ini', textwrap.dedent('''\
+            ; License header
+
+            [Strings]
+            key=value
+
+            ; comment
+            junk
+
+            [Section]
+            other=value
+
+             indented=value
+            ''') * 5)
+
+    def test_no_streaming(self):
+        path = mozpath.join(self.dir, 'file.dtd')
+        with open(path, 'wb') as fh:
+            fh.write(b'<!ENTITY key "value">\n')
+        p = parser.createParser(path)
+        p.readFile(path, stream=True)
+        self.assertIsNotNone(p.ctx)
+        self.assertEqual([entity.key for entity in p], ['key'])
+
+
+class TestParserFactory(unittest.TestCase):
+    def test_create(self):
+        p = parser.createParser('some/file.properties')
+        self.assertIsInstance(p, parser.PropertiesParser)
+        self.assertIsNot(p, parser.createParser('some/file.properties'))
+        with self.assertRaises(UserWarning):
+            parser.createParser('some/file.js')
+
+    def test_thread_local(self):
+        p = parser.getParser('some/file.dtd')
+        self.assertIsInstance(p, parser.DTDParser)
+        self.assertIs(p, parser.getParser('other/file.dtd'))
+        others = []
+        thread = threading.Thread(
+            target=lambda: others.append(parser.getParser('some/file.dtd'))
+        )
+        thread.start()
+        thread.join()
+        self.assertIsInstance(others[0], parser.DTDParser)
+        self.assertIsNot(others[0], p)
+
+
+class TestPlugins(unittest.TestCase):
+    def setUp(self):
+        self.entry_point = mock.Mock()
+        self.entry_point.load.return_value = DummyParser
+        del self.entry_point.resolve
+        patcher = mock.patch(
+            'compare_locales.parser._iter_entry_points',
+            return_value=[self.entry_point]
+        )
+        self.iter_entry_points = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, parser, '_plugins', None)
+        parser._plugins = None
 
     def test_dummy_parser(self):
         p = parser.getParser('some/weird/file.ext')
         self.assertIsInstance(p, DummyParser)
+        self.assertIsInstance(
+            parser.createParser('some/weird/file.ext'), DummyParser
+        )
+        self.assertTrue(parser.hasParser('other/weird/file.ext'))
+        self.assertFalse(parser.hasParser('some/image.png'))
+        # plugins are only loaded once
+        self.assertEqual(self.iter_entry_points.call_count, 1)
+        self.assertEqual(self.entry_point.load.call_count, 1)
+
+    def test_builtin(self):
+        self.assertTrue(parser.hasParser('some/file.ftl'))
+        # our own parsers don't need plugins
+        self.assertEqual(self.iter_entry_points.call_count, 0)
 
 
 class DummyParser(parser.Parser):